@@ -1,12 +1,16 @@
 import streamlit as st
-import pandas as pd
-from docx import Document
-from docx.shared import Cm, Pt
-from docx.oxml.ns import qn
-from docx.enum.table import WD_ROW_HEIGHT_RULE
-from docx.enum.text import WD_LINE_SPACING
+from contextlib import nullcontext
 from io import BytesIO
-import re
+import hashlib
+
+from docx.shared import Cm
+from labelgen import (
+    BUNDLE_PAGES_PER_FILE, DEFAULT_LAYOUT, ENGINE_DOCX, ENGINES, JOB_FAILED, JOB_QUEUED, LAYOUT_DEFAULT,
+    LAYOUT_PRESETS, PARSE_WORKERS_DEFAULT, PARSE_WORKERS_ENV, UPLOAD_MAX_BYTES_DEFAULT, UPLOAD_MAX_BYTES_ENV,
+    UPLOAD_MAX_ROWS_DEFAULT, UPLOAD_MAX_ROWS_ENV, DocumentCache, JobQueue, LabelLayout, Limiter, UploadTooLarge,
+    check_pdf_support, check_upload, generate_label_bundle, generate_label_pdf, generate_word_doc, int_from_env, label_cache_key,
+    load_excel_with_auto_header, recording,
+)
 
 # --- 設定頁面資訊 ---
 st.set_page_config(
@@ -15,153 +19,344 @@ st.set_page_config(
     layout="centered"
 )
 
-# --- 輔助函式 ---
+# 上傳檔解析結果的快取：最多保留幾份、保留多久 (秒)
+EXCEL_CACHE_MAX_ENTRIES = 32
+EXCEL_CACHE_TTL = 60 * 60
+
+# 同時解析的上傳檔數，以及解析前就擋下的檔案大小、列數上限 (環境變數見 labelgen.admission)
+PARSE_WORKERS = int_from_env(PARSE_WORKERS_ENV, PARSE_WORKERS_DEFAULT)
+UPLOAD_MAX_BYTES = int_from_env(UPLOAD_MAX_BYTES_ENV, UPLOAD_MAX_BYTES_DEFAULT)
+UPLOAD_MAX_ROWS = int_from_env(UPLOAD_MAX_ROWS_ENV, UPLOAD_MAX_ROWS_DEFAULT)
+
+# 已生成 .docx 的快取總容量上限 (位元組)，整個伺服器共用
+DOCUMENT_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# 背景生成：同時執行的工作數由環境變數 LABELGEN_JOB_WORKERS 設定 (預設 2)，
+# ooxml-parallel 每個工作的子行程數由 LABELGEN_PROCESS_WORKERS 設定 (預設平分 CPU 核心)，
+# 進行中的工作每隔幾秒更新一次畫面
+JOB_POLL_SECONDS = 1
+
+# --- 輸出方式 ---
+OUTPUT_SINGLE = 'single'
+OUTPUT_BUNDLE = 'bundle'
+OUTPUT_PDF = 'pdf'
+OUTPUT_MODES = {
+    OUTPUT_SINGLE: '單一 Word 檔',
+    OUTPUT_BUNDLE: '分冊 ZIP (每份 N 頁)',
+    OUTPUT_PDF: 'PDF (直接送印)',
+}
+# 各輸出方式的下載按鈕文字、檔名 ({grid} 為版面的欄x列) 與 MIME 類型
+OUTPUT_FILES = {
+    OUTPUT_SINGLE: (
+        "📥 下載 Word 標籤檔 (.docx)", "標籤_{grid}_最終版.docx",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ),
+    OUTPUT_BUNDLE: ("📥 下載分冊標籤檔 (.zip)", "標籤_{grid}_分冊.zip", "application/zip"),
+    OUTPUT_PDF: ("📥 下載 PDF 標籤檔 (.pdf)", "標籤_{grid}_最終版.pdf", "application/pdf"),
+}
+# 版面選單中的自訂尺寸選項
+LAYOUT_CUSTOM = 'custom'
+
+# --- 上傳檔解析 ---
+
+@st.cache_data(max_entries=EXCEL_CACHE_MAX_ENTRIES, ttl=EXCEL_CACHE_TTL, show_spinner=False)
+def _load_excel_cached(content_hash, _content, max_rows):
+    """以檔案內容的 SHA-256 為鍵快取解析結果 (_content 不參與雜湊)"""
+    return load_excel_with_auto_header(BytesIO(_content), max_rows=max_rows)
+
+@st.cache_resource
+def _parse_limiter():
+    return Limiter(PARSE_WORKERS)
+
+def load_uploaded_excel(uploaded_file):
+    """
+    解析上傳的 Excel；同一份內容在 Streamlit 重跑時直接取用快取，不再重新解析。
+
+    超過大小或列數上限時丟出 UploadTooLarge。同時解析的檔案數有上限，
+    額滿時排隊並顯示順位。
+    """
+    content = uploaded_file.getvalue()
+    content_hash = hashlib.sha256(content).hexdigest()
+    # 這個 session 解析過同一份檔案，結果已在快取中，不必排隊
+    if st.session_state.get('parsed_upload') == content_hash:
+        return _load_excel_cached(content_hash, content, UPLOAD_MAX_ROWS)
+
+    check_upload(BytesIO(content), uploaded_file.size, UPLOAD_MAX_BYTES, UPLOAD_MAX_ROWS)
+    notice = st.empty()
+    with _parse_limiter().slot(on_wait=lambda position: notice.info(f"⏳ 讀檔的人較多，排隊中：第 {position} 位")):
+        notice.empty()
+        df = _load_excel_cached(content_hash, content, UPLOAD_MAX_ROWS)
+    st.session_state['parsed_upload'] = content_hash
+    return df
+
+# --- 生成結果快取 ---
+
+@st.cache_resource
+def _document_cache():
+    return DocumentCache(DOCUMENT_CACHE_MAX_BYTES)
+
+def _generate_cached(key, generate):
+    """回傳給背景工作執行的函式：先查快取，沒有才生成並放進快取"""
+    # 快取物件在 script 執行緒取得，背景執行緒不必碰 Streamlit
+    cache = _document_cache()
+
+    def run():
+        data = cache.get(key)
+        if data is None:
+            with generate() as output:
+                data = output.read()
+            cache.put(key, data)
+        return data
+    return run
 
-def load_excel_with_auto_header(file):
+def word_doc_job(df, engine=ENGINE_DOCX, table_per_page=False, layout=DEFAULT_LAYOUT, workers=None):
     """
-    自動偵測 Excel 的標題列位置。
+    回傳 (快取鍵, 生成 .docx bytes 的函式)；相同資料與版面設定再次生成時直接取用快取。
+    workers 為 ooxml-parallel 引擎的子行程數。
+    """
+    key = (label_cache_key(df, layout), table_per_page)
+    return key, _generate_cached(key, lambda: generate_word_doc(
+        df, engine=engine, workers=workers, table_per_page=table_per_page, layout=layout,
+    ))
+
+def label_bundle_job(df, pages_per_file, engine=ENGINE_DOCX, table_per_page=False, layout=DEFAULT_LAYOUT,
+                     workers=None):
+    """同 word_doc_job，生成分冊 ZIP；快取鍵另外加上分冊頁數"""
+    key = (label_cache_key(df, layout), OUTPUT_BUNDLE, pages_per_file, table_per_page)
+    return key, _generate_cached(key, lambda: generate_label_bundle(
+        df, pages_per_file=pages_per_file, engine=engine, workers=workers, table_per_page=table_per_page,
+        layout=layout,
+    ))
+
+def label_pdf_job(df, layout=DEFAULT_LAYOUT):
+    """同 word_doc_job，生成 PDF；字型由環境變數 LABELGEN_PDF_FONT 指定"""
+    key = (label_cache_key(df, layout), OUTPUT_PDF)
+    return key, _generate_cached(key, lambda: generate_label_pdf(df, layout=layout))
+
+def available_output_modes():
+    """
+    可選的輸出方式與不提供 PDF 的原因：沒有 reportlab 或中文字型時 PDF 一定失敗，
+    乾脆不列出來 (原因為 None 表示 PDF 可用)
     """
     try:
-        # 讀取前 20 列來搜尋標題
-        df_temp = pd.read_excel(file, header=None, nrows=20, dtype=str)
-    except Exception:
-        return None
-    
-    header_idx = -1
-    
-    # 逐列檢查是否包含關鍵欄位
-    for idx, row in df_temp.iterrows():
-        row_values = [str(val).strip() for val in row.values]
-        if '姓名' in row_values and '通訊地址' in row_values:
-            header_idx = idx
-            break
-            
-    file.seek(0)
-    
-    if header_idx != -1:
-        return pd.read_excel(file, header=header_idx, dtype=str)
-    else:
-        return pd.read_excel(file, dtype=str)
-
-def set_font(run, size=12, bold=False):
-    """設定中西文字型"""
-    run.font.name = 'Times New Roman'
-    run._element.rPr.rFonts.set(qn('w:eastAsia'), '標楷體')
-    run.font.size = Pt(size)
-    run.font.bold = bold
-
-def generate_word_doc(df):
-    """生成 Word 文件的核心邏輯"""
-    doc = Document()
-    
-    # --- 1. 版面設定：A4 滿版零邊界 ---
-    section = doc.sections[0]
-    section.page_height = Cm(29.7)
-    section.page_width = Cm(21.0)
-    section.top_margin = Cm(0)
-    section.bottom_margin = Cm(0)
-    section.left_margin = Cm(0)
-    section.right_margin = Cm(0)
-    section.header_distance = Cm(0)
-    section.footer_distance = Cm(0)
-
-    # 建立表格 (2欄 x N列)
-    total_items = len(df)
-    rows_needed = (total_items + 1) // 2 
-    
-    table = doc.add_table(rows=rows_needed, cols=2)
-    
-    # --- 無框線設定 (不套用 Table Grid) ---
-    # table.style = 'Table Grid'  <-- 這一行已移除
-    
-    # --- 2. 強制寬度填滿 ---
-    table.autofit = False 
-    table.allow_autofit = False
-    
-    # 強制設定每一欄的寬度為 10.5cm
-    for col in table.columns:
-        col.width = Cm(10.5)
-
-    # 計算每列高度 (3.7cm * 8 = 29.6cm)
-    row_height_val = Cm(3.7)
-
-    # --- 3. 填入資料 ---
-    for i, (index, row_data) in enumerate(df.iterrows()):
-        r = i // 2
-        c = i % 2
-        
-        name = str(row_data.get('姓名', '')).strip()
-        raw_address = str(row_data.get('通訊地址', '')).strip()
-        
-        if name == 'nan': name = ''
-        if raw_address == 'nan': raw_address = ''
-        
-        # 這裡不需要 process_address 去拆分郵遞區號了，因為我們要直接印 raw_address
+        check_pdf_support()
+    except (ImportError, FileNotFoundError) as e:
+        return [mode for mode in OUTPUT_MODES if mode != OUTPUT_PDF], str(e)
+    return list(OUTPUT_MODES), None
 
-        cell = table.rows[r].cells[c]
-        
-        # 確保儲存格寬度
-        cell.width = Cm(10.5)
-        
-        # 設定高度
-        table.rows[r].height_rule = WD_ROW_HEIGHT_RULE.EXACTLY
-        table.rows[r].height = row_height_val
-        
-        cell.vertical_alignment = 1 # 垂直置中
-        cell._element.clear_content()
-        
-        # --- 排版內容 ---
-        
-        # 1. 姓名行
-        p1 = cell.add_paragraph()
-        p1.paragraph_format.left_indent = Cm(0.5)
-        p1.paragraph_format.space_before = Pt(5)
-        p1.paragraph_format.space_after = Pt(2) # 稍微留一點空間給地址
-        p1.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
-        
-        if name:
-            run1 = p1.add_run(f"{name} 君收")
-            set_font(run1, size=14, bold=True)
-            
-        # 2. 地址行 (直接使用原始地址，不拆分，不加 950(950) 那一行)
-        p2 = cell.add_paragraph()
-        p2.paragraph_format.left_indent = Cm(1.3) # 保持縮排，比較美觀
-        p2.paragraph_format.space_before = Pt(0)
-        p2.paragraph_format.space_after = Pt(0)
-        p2.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
-        
-        # 直接印出 raw_address (也就是 Excel 裡的 (950)臺東縣...)
-        run2 = p2.add_run(raw_address)
-        set_font(run2, size=12, bold=False)
+# --- 版面選擇 ---
+
+def choose_layout():
+    """
+    選擇標籤紙版面，回傳 LabelLayout。
+
+    各版面的樣板與母版由 labelgen 依版面快取，切換版面不會拖慢生成；
+    自訂尺寸以預設版面為起點，尺寸不合理時顯示錯誤並停止。
+    """
+    options = list(LAYOUT_PRESETS) + [LAYOUT_CUSTOM]
+    key = st.selectbox(
+        "標籤紙版面",
+        options=options,
+        index=options.index(LAYOUT_DEFAULT),
+        format_func=lambda k: LAYOUT_PRESETS[k].title if k in LAYOUT_PRESETS else "自訂尺寸",
+    )
+    if key != LAYOUT_CUSTOM:
+        return LAYOUT_PRESETS[key]
 
-    # --- 4. 縮小最後游標 ---
+    base = DEFAULT_LAYOUT
+    size, label, text = st.columns(3)
+    page_width = size.number_input("頁寬 (cm)", min_value=1.0, value=base.page_width.cm, step=0.1)
+    page_height = size.number_input("頁高 (cm)", min_value=1.0, value=base.page_height.cm, step=0.1)
+    margin_top = size.number_input("上邊界 (cm)", min_value=0.0, value=base.margin_top.cm, step=0.05)
+    margin_left = size.number_input("左邊界 (cm)", min_value=0.0, value=base.margin_left.cm, step=0.05)
+    cols = label.number_input("欄數", min_value=1, value=base.cols)
+    rows = label.number_input("列數", min_value=1, value=base.rows)
+    label_width = label.number_input("標籤寬 (含間距，cm)", min_value=0.5, value=base.label_width.cm, step=0.05)
+    label_height = label.number_input("標籤高 (含間距，cm)", min_value=0.5, value=base.label_height.cm, step=0.05)
+    name_font_size = text.number_input("姓名字級 (pt)", min_value=6, value=base.name_font_size)
+    address_font_size = text.number_input("地址字級 (pt)", min_value=6, value=base.address_font_size)
+    name_indent = text.number_input("姓名縮排 (cm)", min_value=0.0, value=base.name_indent.cm, step=0.1)
+    address_indent = text.number_input("地址縮排 (cm)", min_value=0.0, value=base.address_indent.cm, step=0.1)
     try:
-        last_paragraph = doc.paragraphs[-1]
-        last_paragraph.paragraph_format.space_after = Pt(0)
-        last_paragraph.paragraph_format.line_spacing = Pt(0)
-        run = last_paragraph.add_run()
-        run.font.size = Pt(1)
-    except:
-        pass
-
-    buffer = BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
+        return LabelLayout(
+            "自訂尺寸", Cm(page_width), Cm(page_height), int(cols), int(rows), Cm(label_width), Cm(label_height),
+            margin_top=Cm(margin_top), margin_left=Cm(margin_left), name_indent=Cm(name_indent),
+            address_indent=Cm(address_indent), name_font_size=int(name_font_size),
+            address_font_size=int(address_font_size),
+        )
+    except ValueError as e:
+        st.error(f"❌ 版面設定有誤：{e}")
+        st.stop()
+
+# --- 效能量測 ---
+
+STAGE_LABELS = {
+    'open': '開啟活頁簿',
+    'header': '偵測標題列',
+    'rows': '讀取資料列',
+    'clean': '清理資料',
+    'build': '建立表格',
+    'save': '存檔',
+    'build_save': '排版並存檔',
+}
+
+def profile_recording(**context):
+    """側邊欄開啟效能量測時記錄各階段，否則不做任何事"""
+    return recording(**context) if st.session_state.get('profiling') else nullcontext()
+
+def show_profile(reports):
+    """把量測結果放在可收合的面板中；reports 為 (標題, Report 或 None)"""
+    with st.expander("🔍 效能量測"):
+        for title, report in reports:
+            st.markdown(f"**{title}**")
+            if report is None or not report.stages:
+                st.caption("使用快取結果，這次沒有重新執行。")
+                continue
+            st.dataframe([
+                {
+                    '階段': STAGE_LABELS.get(s['stage'], s['stage']),
+                    '秒數': round(s['seconds'], 3),
+                    'RSS (MB)': round(s['rss_mb'] or 0, 1),
+                    '峰值 RSS (MB)': round(s['peak_rss_mb'] or 0, 1),
+                    '筆數': s.get('labels', s.get('rows')),
+                }
+                for s in report.stages
+            ], hide_index=True)
+            if len(report.progress) > 1:
+                st.line_chart(
+                    [{'秒數': p['elapsed'], '已完成筆數': p['done']} for p in report.progress],
+                    x='秒數', y='已完成筆數', height=200,
+                )
+            st.caption(
+                f"總計 {report.seconds:.2f} 秒，行程峰值 RSS {report.peak_rss_mb or 0:.0f} MB "
+                f"(記憶體為整個伺服器行程，含其他使用者)"
+            )
+
+# --- 背景工作 ---
+
+@st.cache_resource
+def _job_queue():
+    return JobQueue()
+
+def job_source(content_hash, output_mode, pages_per_file=None, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """工作結果對應的上傳內容與輸出設定；與畫面上目前的不同時，不顯示那個工作的結果"""
+    return (content_hash, output_mode, pages_per_file, table_per_page, layout.signature())
+
+def submit_job(output_mode, df, engine, pages_per_file=None, table_per_page=False, layout=DEFAULT_LAYOUT,
+               source=None, file_name=None):
+    """
+    把生成排進背景佇列，工作 ID 記在 session 與網址上，重新整理頁面後仍找得到。
+
+    ooxml-parallel 的子行程數取自佇列的 process_workers，同時執行的工作加起來不會超過 CPU 核心數。
+    source (見 job_source) 與上傳檔名記在工作上，換了檔案或設定後就不再顯示這個結果。
+    """
+    queue = _job_queue()
+    if output_mode == OUTPUT_BUNDLE:
+        key, run = label_bundle_job(
+            df, pages_per_file, engine=engine, table_per_page=table_per_page, layout=layout,
+            workers=queue.process_workers,
+        )
+    elif output_mode == OUTPUT_PDF:
+        key, run = label_pdf_job(df, layout=layout)
+    else:
+        key, run = word_doc_job(
+            df, engine=engine, table_per_page=table_per_page, layout=layout, workers=queue.process_workers,
+        )
+    info = {
+        'output_mode': output_mode, 'labels': len(df), 'grid': f'{layout.cols}x{layout.rows}',
+        'source': source, 'file_name': file_name,
+    }
+    job_id = queue.submit(
+        run, key=key, info=info,
+        profile=st.session_state.get('profiling', False),
+    )
+    st.session_state['job_id'] = job_id
+    st.query_params['job'] = job_id
+
+def forget_job():
+    st.session_state.pop('job_id', None)
+    st.query_params.pop('job', None)
+
+def _progress_text(done, total, stage):
+    label = STAGE_LABELS.get(stage, stage or "準備中")
+    return f"{label}：{done:,} / {total:,} 張標籤" if total else f"{label}..."
+
+def _poll_job(job_id):
+    """工作進行中：每 JOB_POLL_SECONDS 秒只重跑這一段，更新進度條"""
+    job = _job_queue().get(job_id)
+    if job is None or job.is_finished:
+        st.rerun()
+    if job.status == JOB_QUEUED:
+        position = _job_queue().position(job_id)
+        st.progress(0.0, text=f"排隊中：第 {position} 位，等待其他生成工作完成...")
+        return
+    done, total, stage = job.progress
+    # 總數未知的階段 (例如 python-docx 存檔) 維持目前的進度，只更新文字
+    st.progress(min(done / total, 1.0) if total else 0.0, text=_progress_text(done, total, stage))
+
+def show_job(job_id, source=None):
+    """
+    顯示背景工作的進度或結果。
+
+    source 為目前上傳檔與輸出設定 (見 job_source)，沒有上傳檔時為 None；
+    與工作的不同時忘掉這個工作，以免下載到上一份名單的標籤。
+    """
+    job = _job_queue().get(job_id)
+    if job is None:
+        st.warning("找不到這個生成工作 (可能已過期)，請重新生成。")
+        forget_job()
+        return
+    if source is not None and job.info.get('source') != source:
+        forget_job()
+        return
+    if not job.is_finished:
+        st.fragment(_poll_job, run_every=JOB_POLL_SECONDS)(job_id)
+        return
+    if job.status == JOB_FAILED:
+        st.error(f"❌ 生成失敗：{job.error}")
+        return
+
+    label, file_name, mime = OUTPUT_FILES[job.info['output_mode']]
+    st.download_button(label=label, data=job.result, file_name=file_name.format(grid=job.info['grid']), mime=mime)
+    st.caption(
+        f"來源：{job.info.get('file_name') or '未知'}，共 {job.info['labels']:,} 張標籤，"
+        f"耗時 {job.finished - job.submitted:.1f} 秒 (含排隊)"
+    )
+    st.info("💡 **列印提示**：請選擇 **「實際大小 (Actual Size)」**。")
+
+    if job.report is not None:
+        show_profile([
+            ("讀取 Excel", st.session_state.get('load_report')),
+            ("生成標籤", job.report),
+        ])
 
 # --- Streamlit UI ---
 
+st.sidebar.toggle("🔍 效能量測", key='profiling', help="記錄讀檔與生成各階段的耗時與記憶體")
+
 st.title("🏷️ 生日賀卡標籤生成器")
 st.markdown("""
-本工具設定為 **A4 滿版 (2欄 x 8列)**，**無框線**，**移除上方郵遞區號**。
+本工具預設為 **A4 滿版 (2欄 x 8列)**，**無框線**，**移除上方郵遞區號**，也可以改選其他標籤紙或信封。
 直接顯示姓名與 Excel 中的完整地址。
 """)
 
 uploaded_file = st.file_uploader("上傳 Excel 檔案 (.xlsx)", type=['xlsx'])
+# 目前的上傳檔與輸出設定 (見 job_source)；有上傳檔時只顯示同一份檔案、同一組設定的生成結果，
+# 讀檔失敗時維持空的 tuple，不會與任何工作相符
+current_source = None
 
 if uploaded_file is not None:
+    current_source = ()
     try:
-        df = load_excel_with_auto_header(uploaded_file)
+        try:
+            with profile_recording(file=uploaded_file.name) as load_report:
+                df = load_uploaded_excel(uploaded_file)
+        except UploadTooLarge as e:
+            st.error(f"❌ 檔案太大，請分批上傳：{e}")
+            st.stop()
+        # 解析結果有快取，重跑時沒有新的量測，保留上一次的
+        if load_report is not None and load_report.stages:
+            st.session_state['load_report'] = load_report
         
         if df is None:
             st.error("❌ 無法讀取 Excel 檔案，請確認格式。")
@@ -176,19 +371,53 @@ if uploaded_file is not None:
             
         st.success(f"✅ 讀取成功！共 {len(df)} 筆資料")
         
+        engine = st.radio(
+            "生成引擎",
+            options=list(ENGINES),
+            format_func=ENGINES.get,
+            horizontal=True,
+        )
+        
+        layout = choose_layout()
+        
+        # 頁數很多時 Word 開不動單一檔案，預設改成分冊
+        total_pages = -(-len(df) // layout.labels_per_page)
+        output_modes, pdf_unavailable = available_output_modes()
+        output_mode = st.radio(
+            "輸出方式",
+            options=output_modes,
+            format_func=OUTPUT_MODES.get,
+            index=1 if total_pages > BUNDLE_PAGES_PER_FILE else 0,
+            horizontal=True,
+        )
+        if pdf_unavailable:
+            st.caption(f"ℹ️ 目前無法輸出 PDF：{pdf_unavailable}")
+        pages_per_file = None
+        if output_mode == OUTPUT_BUNDLE:
+            pages_per_file = int(st.number_input(
+                f"每份頁數 (共 {total_pages} 頁)", min_value=1, value=BUNDLE_PAGES_PER_FILE, step=50,
+            ))
+        table_per_page = output_mode != OUTPUT_PDF and st.checkbox(
+            "每頁一個表格", value=False,
+            disabled=not layout.page_break_fits,
+            help="每頁各自一個表格並明確分頁，頁數多時 Word 開檔與捲動較快；印出來的標籤位置不變"
+                 "（最後一列下方要留至少 1pt 才能使用）",
+        ) and layout.page_break_fits
+        current_source = job_source(
+            st.session_state['parsed_upload'], output_mode, pages_per_file, table_per_page, layout,
+        )
+        
         if st.button("🚀 生成標籤 (最終修正版)", type="primary"):
-            with st.spinner('正在生成...'):
-                docx_buffer = generate_word_doc(df)
-                
-                st.download_button(
-                    label="📥 下載 Word 標籤檔 (.docx)",
-                    data=docx_buffer,
-                    file_name="標籤_2x8_最終版.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                )
-                
-                st.info("💡 **列印提示**：請選擇 **「實際大小 (Actual Size)」**。")
+            submit_job(
+                output_mode, df, engine, pages_per_file, table_per_page=table_per_page, layout=layout,
+                source=current_source, file_name=uploaded_file.name,
+            )
 
     except Exception as e:
         st.error(f"程式發生錯誤：{e}")
         st.exception(e)
+
+# 生成在背景執行；重新整理頁面後 session 是新的，改從網址上的工作 ID 找回
+job_id = st.session_state.get('job_id') or st.query_params.get('job')
+if job_id:
+    show_job(job_id, current_source)
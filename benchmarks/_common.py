@@ -0,0 +1,103 @@
+"""benchmarks 共用的小工具：載入標籤引擎、產生測試資料。"""
+import importlib.util
+import io
+import os
+import random
+import re
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 產生隨機地址用的常見字
+_ADDRESS_CHARS = '臺北市中正區重慶南路一段新竹縣竹北市光明六路高雄市前金區中華三路臺東縣花蓮鄉村里鄰巷弄樓之號'
+
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def _quiet_streamlit():
+    # 舊版 app.py 在匯入時就會建立 UI，裸跑 (bare mode) 時 Streamlit 會不停警告，這裡先關掉
+    import streamlit.logger
+    streamlit.logger.set_log_level('error')
+
+
+def _load_module(name, path, package_dir=None):
+    spec = importlib.util.spec_from_file_location(
+        name, path,
+        submodule_search_locations=[package_dir] if package_dir else None,
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_engine(rev=None):
+    """
+    匯入標籤引擎並回傳模組 (提供 generate_word_doc、load_excel_with_auto_header 等)。
+
+    rev 為 git 版本 (例如 HEAD~1) 時，改為載入該版本的程式碼，方便比較前後差異：
+    有 labelgen 套件的版本載入套件，更早的版本則載入當時的 app.py。
+    """
+    if rev is None:
+        import labelgen
+        return labelgen
+
+    checkout = tempfile.mkdtemp(prefix='labelgen_')
+    archive = subprocess.run(
+        ['git', 'archive', rev],
+        cwd=REPO_ROOT, check=True, capture_output=True
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(checkout, filter='data')
+
+    alias = re.sub(r'\W', '_', f'rev_{rev}')
+    package_dir = os.path.join(checkout, 'labelgen')
+    if os.path.isdir(package_dir):
+        return _load_module(alias, os.path.join(package_dir, '__init__.py'), package_dir)
+    _quiet_streamlit()
+    return _load_module(alias, os.path.join(checkout, 'app.py'))
+
+
+def make_records_frame(n):
+    """產生 n 筆 (姓名, 通訊地址) 的 DataFrame，欄位型態與 load_excel_with_auto_header 相同"""
+    import pandas as pd
+    return pd.DataFrame({
+        '姓名': [f'王小明{i}' for i in range(n)],
+        '通訊地址': [f'(950)臺東縣臺東市中華路一段{i}號' for i in range(n)],
+    }, dtype=str)
+
+
+def make_address(i, length=None, rng=None):
+    """第 i 筆的地址；length 為中文字數，未指定時為固定格式的短地址"""
+    if length is None:
+        return f'(950)臺東縣臺東市中華路一段{i}號'
+    rng = rng or random.Random(i)
+    return f'({100 + i % 900})' + ''.join(rng.choice(_ADDRESS_CHARS) for _ in range(length)) + f'{i}號'
+
+
+def make_workbook(n, header_offset=2, extra_columns=3, address_length=None, seed=0):
+    """
+    產生 n 筆資料的 .xlsx (bytes)。
+
+    標題列前有 header_offset 列說明文字，另外附上 extra_columns 個用不到的欄位，
+    模擬實際匯出的會員名單。address_length 指定地址的中文字數 (以 seed 固定亂數，結果可重現)。
+    """
+    import openpyxl
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for i in range(header_offset):
+        ws.append([f'會員名單 說明第 {i + 1} 列'])
+    extras = [f'欄位{j}' for j in range(extra_columns)]
+    ws.append(['編號', '姓名', '通訊地址', *extras])
+    for i in range(n):
+        address = make_address(i, address_length, rng)
+        ws.append([i + 1, f'王小明{i}', address, *(f'{j}-{i}' for j in range(extra_columns))])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
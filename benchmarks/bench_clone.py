@@ -0,0 +1,56 @@
+"""
+比較 python-docx 逐格排版與整頁樣板複製 (clone_engine) 的耗時。
+
+    python benchmarks/bench_clone.py                # 10k / 100k
+    python benchmarks/bench_clone.py 1000 5000 --repeat 3
+
+兩者用同一份資料，分別量測排版 (建立 Document) 與存檔，並確認輸出的 document.xml 相同。
+"""
+import argparse
+import io
+import time
+import zipfile
+
+from _common import load_engine, make_records_frame
+
+
+def time_build(build, records):
+    start = time.perf_counter()
+    doc = build(records)
+    built = time.perf_counter()
+    output = io.BytesIO()
+    doc.save(output)
+    return built - start, time.perf_counter() - built, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('sizes', nargs='*', type=int, default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=1, help='每組重複次數，取最快的一次')
+    args = parser.parse_args()
+
+    engine = load_engine()
+    builders = [
+        ('逐格排版', engine.build_label_document),
+        ('整頁樣板複製', engine.build_label_document_cloned),
+    ]
+
+    print(f"{'筆數':>8}  {'方式':<10} {'排版':>8} {'存檔':>8} {'加速':>6}")
+    for n in args.sizes:
+        records = list(engine.iter_label_records(make_records_frame(n)))
+        baseline = None
+        outputs = []
+        for label, build in builders:
+            build_seconds, save_seconds, output = min(
+                (time_build(build, records) for _ in range(args.repeat)), key=lambda r: r[0]
+            )
+            outputs.append(zipfile.ZipFile(output).read('word/document.xml'))
+            baseline = baseline or build_seconds
+            print(f"{n:>8}  {label:<10} {build_seconds:>8.2f} {save_seconds:>8.2f} {baseline / build_seconds:>5.1f}x",
+                  flush=True)
+        if outputs[0] != outputs[1]:
+            raise SystemExit(f"{n} 筆的輸出不一致")
+
+
+if __name__ == '__main__':
+    main()
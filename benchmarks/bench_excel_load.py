@@ -0,0 +1,52 @@
+"""
+量測 load_excel_with_auto_header 解析不同大小活頁簿的耗時。
+
+    python benchmarks/bench_excel_load.py                  # 1k / 10k / 50k 列
+    python benchmarks/bench_excel_load.py 20000 --against HEAD~1
+    python benchmarks/bench_excel_load.py --reader calamine --reader openpyxl --reader pandas
+
+--reader 可重複指定，用來比較不同的 Excel 讀取引擎 (舊版 app.py 沒有這個參數)。
+"""
+import argparse
+import io
+import time
+
+from _common import load_engine, make_workbook
+
+
+def time_load(module, content, repeat, reader=None):
+    kwargs = {} if reader is None else {'reader': reader}
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = module.load_excel_with_auto_header(io.BytesIO(content), **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('sizes', nargs='*', type=int, default=[1000, 10000, 50000])
+    parser.add_argument('--against', metavar='REV', help='同時量測此 git 版本的程式碼')
+    parser.add_argument('--reader', action='append', help='load_excel_with_auto_header 的 reader 參數')
+    parser.add_argument('--columns', type=int, default=3, help='額外的無關欄位數')
+    parser.add_argument('--repeat', type=int, default=3, help='每組重複次數，取最快的一次')
+    args = parser.parse_args()
+
+    engine = load_engine()
+    targets = [(reader, engine, reader) for reader in args.reader] if args.reader else [('目前版本', engine, None)]
+    if args.against:
+        targets.append((args.against, load_engine(args.against), None))
+
+    print(f"{'列數':>8}  {'版本':<12} {'秒數':>9}")
+    for n in args.sizes:
+        content = make_workbook(n, extra_columns=args.columns)
+        for label, module, reader in targets:
+            elapsed, rows = time_load(module, content, args.repeat, reader)
+            assert rows == n, (label, rows)
+            print(f"{n:>8}  {label:<12} {elapsed:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
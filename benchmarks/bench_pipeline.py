@@ -0,0 +1,238 @@
+"""
+量測「讀取 Excel → 清理 → 排版 → 存檔」每個階段的耗時、峰值 RSS 與輸出大小。
+
+    python benchmarks/bench_pipeline.py                                  # 1k / 10k，python-docx 與 ooxml 並列
+    python benchmarks/bench_pipeline.py 50000 --engine ooxml --engine ooxml-parallel
+    python benchmarks/bench_pipeline.py 10000 --columns 3 40 --header-offset 0 15 --address-length 10 60
+    python benchmarks/bench_pipeline.py 5000 --engine python-docx --against HEAD~3 --json result.json
+
+列數、欄數、標題偏移、地址長度可各給多個值，會跑完所有組合。測試資料以固定亂數產生，可重現。
+每一組都在新的子行程中執行，峰值 RSS 才不會被前一組墊高 (只計主行程，不含平行引擎的子行程)。
+ooxml / ooxml-parallel / pdf 引擎的排版與存檔是同一個串流步驟，耗時全部記在「排版」。
+舊版程式碼沒有分階段的函式時，整個 generate_word_doc 記在「排版」。
+"""
+import argparse
+import importlib
+import inspect
+import io
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import load_engine, make_workbook
+
+STAGES = ('load', 'clean', 'layout', 'save')
+STAGE_LABELS = {'load': '讀取', 'clean': '清理', 'layout': '排版', 'save': '存檔'}
+# python-docx 類引擎對應的排版函式，排版與存檔分開計時
+BUILDERS = {'python-docx': 'build_label_document', 'python-docx-clone': 'build_label_document_cloned'}
+
+
+def peak_rss_mb():
+    """目前行程的峰值 RSS (MB)；無法取得時回傳 None"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 的單位是 KB，macOS 是 bytes
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+def _accepts(fn, name):
+    """fn 是否接受名為 name 的參數 (舊版的函式可能還沒有)"""
+    parameters = inspect.signature(fn).parameters.values()
+    return any(p.name == name or p.kind is p.VAR_KEYWORD for p in parameters)
+
+
+def _submodule(module, name):
+    """module 底下的子模組；module 不是套件 (舊版的 app.py) 或沒有這個子模組時回傳 None"""
+    try:
+        return importlib.import_module(f'{module.__name__}.{name}')
+    except ImportError:
+        return None
+
+
+def _python_docx_steps(module, engine, records, output):
+    """
+    python-docx 引擎的排版與存檔，與 write_with_python_docx 走同一條路：
+    以 _new_shared_document 建立文件、save_label_document 存檔；舊版沒有這兩個函式時用 doc.save
+    """
+    build = getattr(module, BUILDERS[engine], None)
+    if build is None:
+        return None
+    docx_engine = _submodule(module, 'docx_engine')
+    ooxml_engine = _submodule(module, 'ooxml_engine')
+    new_document = getattr(docx_engine, '_new_shared_document', None)
+    save_label_document = getattr(ooxml_engine, 'save_label_document', None)
+
+    doc = {}
+    if new_document is not None and save_label_document is not None and _accepts(build, 'new_document'):
+        return [
+            ('layout', lambda: doc.setdefault('doc', build(records, new_document=new_document))),
+            ('save', lambda: save_label_document(doc['doc'], output)),
+        ]
+    return [
+        ('layout', lambda: doc.setdefault('doc', build(records))),
+        ('save', lambda: doc['doc'].save(output)),
+    ]
+
+
+def _layout_and_save(module, engine, records, df, output, workers):
+    """依引擎回傳 [(階段, 函式), ...]；舊版沒有對應函式時退回 generate_word_doc"""
+    if engine in BUILDERS:
+        steps = _python_docx_steps(module, engine, records, output)
+        if steps is not None:
+            return steps
+    if engine == 'ooxml' and hasattr(module, 'write_ooxml_docx'):
+        return [('layout', lambda: module.write_ooxml_docx(records, output))]
+    if engine == 'ooxml-parallel' and hasattr(module, 'write_ooxml_docx_parallel'):
+        return [('layout', lambda: module.write_ooxml_docx_parallel(records, output, workers=workers))]
+    if engine == 'pdf':
+        return [('layout', lambda: module.write_label_pdf(records, output))]
+
+    if engine != 'python-docx' and not _accepts(module.generate_word_doc, 'engine'):
+        raise ValueError(f"generate_word_doc 沒有 engine 參數，無法使用 {engine} 引擎")
+
+    def generate():
+        # 最早的版本沒有 engine 參數，python-docx 引擎就不傳
+        kwargs = {} if engine == 'python-docx' else {'engine': engine}
+        with module.generate_word_doc(df, **kwargs) as docx_file:
+            shutil.copyfileobj(docx_file, output)
+    return [('layout', generate)]
+
+
+def _run_pipeline(module, spec, workbook, output, stage):
+    if spec['reader'] is not None and not _accepts(module.load_excel_with_auto_header, 'reader'):
+        raise ValueError("load_excel_with_auto_header 沒有 reader 參數")
+    kwargs = {} if spec['reader'] is None else {'reader': spec['reader']}
+    df = stage('load', lambda: module.load_excel_with_auto_header(workbook, **kwargs))
+    df.columns = [str(c).strip() for c in df.columns]
+
+    records = None
+    if hasattr(module, 'iter_label_records'):
+        records = stage('clean', lambda: list(module.iter_label_records(df)))
+
+    for name, fn in _layout_and_save(module, spec['engine'], records, df, output, spec['workers']):
+        stage(name, fn)
+    return len(df)
+
+
+def run_child(spec):
+    """子行程：跑一次完整流程，回傳各階段結果"""
+    module = load_engine(spec['rev'])
+
+    # 先用兩筆資料跑一次，延遲匯入 (pandas、python-docx...) 與各行程的快取不算進量測
+    try:
+        _run_pipeline(module, spec, io.BytesIO(make_workbook(2)), io.BytesIO(), lambda name, fn: fn())
+    except (AttributeError, TypeError, ValueError) as e:
+        return {'error': f"此版本不支援：{e}"}
+
+    result = {'start_rss_mb': peak_rss_mb(), 'seconds': {}, 'peak_rss_mb': {}}
+
+    def stage(name, fn):
+        start = time.perf_counter()
+        value = fn()
+        result['seconds'][name] = time.perf_counter() - start
+        result['peak_rss_mb'][name] = peak_rss_mb()
+        return value
+
+    # 輸出寫到暫存檔，避免輸出內容本身算進 RSS
+    with open(spec['workbook'], 'rb') as workbook, tempfile.TemporaryFile() as output:
+        result['rows'] = _run_pipeline(module, spec, workbook, output, stage)
+        result['output_bytes'] = output.seek(0, io.SEEK_END)
+    return result
+
+
+def run_case(spec, repeat):
+    """在新的子行程中跑 repeat 次，取總耗時最短的一次"""
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', json.dumps(spec)],
+            capture_output=True, text=True, encoding='utf-8',
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"子行程失敗：{spec}\n{proc.stderr}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if 'error' in result:
+            return result
+        if best is None or sum(result['seconds'].values()) < sum(best['seconds'].values()):
+            best = result
+    return best
+
+
+def _format_seconds(value):
+    return f"{value:>7.2f}" if value is not None else f"{'—':>7}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('sizes', nargs='*', type=int, default=[1000, 10000])
+    parser.add_argument('--columns', nargs='+', type=int, default=[3], help='額外的無關欄位數')
+    parser.add_argument('--header-offset', nargs='+', type=int, default=[2], help='標題列前的說明列數')
+    parser.add_argument('--address-length', nargs='+', type=int, default=[None], help='地址的中文字數 (預設為固定短地址)')
+    parser.add_argument('--engine', action='append', help='要比較的引擎，可重複指定 (預設 python-docx 與 ooxml)')
+    parser.add_argument('--against', metavar='REV', help='同時量測此 git 版本的程式碼')
+    parser.add_argument('--reader', help='load_excel_with_auto_header 的 reader 參數 (預設不指定)')
+    parser.add_argument('--workers', type=int, help='ooxml-parallel 引擎的子行程數')
+    parser.add_argument('--repeat', type=int, default=1, help='每組重複次數，取最快的一次')
+    parser.add_argument('--json', metavar='PATH', help='另外把完整結果寫成 JSON')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(json.loads(args.child))))
+        return
+
+    engines = args.engine or ['python-docx', 'ooxml']
+    revisions = [None] + ([args.against] if args.against else [])
+
+    header = f"{'列數':>7} {'欄數':>4} {'偏移':>4} {'地址':>4}  {'引擎':<15} {'版本':<8}"
+    header += ''.join(f" {STAGE_LABELS[s]:>5}" for s in STAGES)
+    header += f" {'總計':>5} {'起始RSS':>7} {'峰值RSS':>7} {'檔案大小':>10}"
+    print(header)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n, columns, offset, length in itertools.product(
+                args.sizes, args.columns, args.header_offset, args.address_length):
+            workbook = os.path.join(workdir, f'{n}_{columns}_{offset}_{length}.xlsx')
+            with open(workbook, 'wb') as f:
+                f.write(make_workbook(n, header_offset=offset, extra_columns=columns, address_length=length))
+
+            for engine, rev in itertools.product(engines, revisions):
+                spec = {'workbook': workbook, 'engine': engine, 'rev': rev,
+                        'reader': args.reader, 'workers': args.workers}
+                result = run_case(spec, args.repeat)
+                result.update(rows=n, columns=columns, header_offset=offset,
+                              address_length=length, engine=engine, rev=rev or '目前版本')
+                results.append(result)
+
+                line = f"{n:>7} {columns:>4} {offset:>4} {length or '-':>4}  {engine:<15} {result['rev']:<8}"
+                if 'error' in result:
+                    print(f"{line} {result['error']}", flush=True)
+                    continue
+                seconds = result['seconds']
+                line += ''.join(f" {_format_seconds(seconds.get(s))}" for s in STAGES)
+                line += f" {sum(seconds.values()):>7.2f}"
+                start_rss = result['start_rss_mb']
+                peak_rss = max(filter(None, result['peak_rss_mb'].values()), default=None)
+                line += f" {start_rss or 0:>9.1f} {peak_rss or 0:>9.1f} {result['output_bytes']:>12,}"
+                print(line, flush=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
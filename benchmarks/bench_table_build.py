@@ -0,0 +1,52 @@
+"""
+量測 generate_word_doc 在不同筆數下的耗時。
+
+    python benchmarks/bench_table_build.py                 # 1k / 10k / 50k
+    python benchmarks/bench_table_build.py 1000 5000 --against HEAD~1
+    python benchmarks/bench_table_build.py --engine ooxml
+    python benchmarks/bench_table_build.py 200000 --engine ooxml-parallel --workers 16
+
+--against 會另外載入指定 git 版本的程式碼一起跑，用來比較修改前後。
+舊版逐筆使用 table.rows[r] 是 O(n²)，50k 筆可能要跑上數小時，請自行斟酌筆數。
+"""
+import argparse
+import io
+import time
+
+from _common import load_engine, make_records_frame
+
+
+def time_generate(module, df, engine=None, workers=None):
+    # 舊版的 generate_word_doc 沒有 engine / workers 參數，未指定時就不傳
+    kwargs = {} if engine is None else {'engine': engine}
+    if workers is not None:
+        kwargs['workers'] = workers
+    start = time.perf_counter()
+    with module.generate_word_doc(df, **kwargs) as output:
+        elapsed = time.perf_counter() - start
+        size = output.seek(0, io.SEEK_END)
+    return elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('sizes', nargs='*', type=int, default=[1000, 10000, 50000])
+    parser.add_argument('--against', metavar='REV', help='同時量測此 git 版本的程式碼')
+    parser.add_argument('--engine', help='generate_word_doc 的 engine 參數 (預設不指定)')
+    parser.add_argument('--workers', type=int, help='generate_word_doc 的 workers 參數 (預設不指定)')
+    args = parser.parse_args()
+
+    targets = [('目前版本', load_engine())]
+    if args.against:
+        targets.append((args.against, load_engine(args.against)))
+
+    print(f"{'筆數':>8}  {'版本':<12} {'秒數':>9} {'檔案大小':>12}")
+    for n in args.sizes:
+        df = make_records_frame(n)
+        for label, module in targets:
+            elapsed, size = time_generate(module, df, args.engine, args.workers)
+            print(f"{n:>8}  {label:<12} {elapsed:>9.2f} {size:>12,}")
+
+
+if __name__ == '__main__':
+    main()
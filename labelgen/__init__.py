@@ -0,0 +1,92 @@
+"""
+生日賀卡標籤生成器的核心引擎 (不依賴 Streamlit)。
+
+Streamlit 介面見 app.py，命令列批次轉檔見 ``python -m labelgen --help``。
+
+下列名稱在第一次取用時才匯入對應的子模組，``import labelgen`` 本身不會載入
+pandas 或 python-docx，批次處理的 worker 行程可以很快啟動。
+"""
+import importlib
+
+# 公開名稱 -> 所在子模組
+_EXPORTS = {
+    'HEADER_SEARCH_ROWS': 'excel',
+    'READER_AUTO': 'excel',
+    'READER_CALAMINE': 'excel',
+    'READER_OPENPYXL': 'excel',
+    'READER_PANDAS': 'excel',
+    'READERS': 'excel',
+    'REQUIRED_COLUMNS': 'excel',
+    'frame_from_rows': 'excel',
+    'iter_excel_records': 'excel',
+    'iter_raw_rows': 'excel',
+    'load_excel_with_auto_header': 'excel',
+    'sheet_filled_rows': 'excel',
+    'sheet_row_count': 'excel',
+    'UploadTooLarge': 'excel',
+    'ENGINE_DOCX': 'generate',
+    'ENGINE_DOCX_CLONE': 'generate',
+    'ENGINE_OOXML': 'generate',
+    'ENGINE_OOXML_PARALLEL': 'generate',
+    'ENGINES': 'generate',
+    'generate_word_doc': 'generate',
+    'write_word_doc': 'generate',
+    'layout_signature': 'layout',
+    'build_label_document': 'docx_engine',
+    'build_label_document_cloned': 'clone_engine',
+    'write_ooxml_docx': 'ooxml_engine',
+    'write_ooxml_docx_parallel': 'parallel',
+    'clean_label_column': 'records',
+    'clean_label_records': 'records',
+    'clean_label_text': 'records',
+    'iter_label_records': 'records',
+    'BUNDLE_PAGES_PER_FILE': 'bundle',
+    'generate_label_bundle': 'bundle',
+    'write_label_bundle': 'bundle',
+    'write_record_bundle': 'bundle',
+    'LABELS_PER_PAGE': 'layout',
+    'DEFAULT_LAYOUT': 'layout',
+    'LAYOUT_DEFAULT': 'layout',
+    'LAYOUT_PRESETS': 'layout',
+    'LabelLayout': 'layout',
+    'PDF_FONT_ENV': 'pdf_engine',
+    'check_pdf_support': 'pdf_engine',
+    'find_pdf_font': 'pdf_engine',
+    'generate_label_pdf': 'pdf_engine',
+    'write_label_pdf': 'pdf_engine',
+    'DocumentCache': 'cache',
+    'label_cache_key': 'cache',
+    'recording': 'instrument',
+    'JOB_DONE': 'jobs',
+    'JOB_FAILED': 'jobs',
+    'JOB_QUEUED': 'jobs',
+    'JOB_RUNNING': 'jobs',
+    'JOB_RESULT_MAX_BYTES_ENV': 'jobs',
+    'JOB_WORKERS_ENV': 'jobs',
+    'PROCESS_WORKERS_ENV': 'jobs',
+    'Job': 'jobs',
+    'JobQueue': 'jobs',
+    'PARSE_WORKERS_DEFAULT': 'admission',
+    'PARSE_WORKERS_ENV': 'admission',
+    'UPLOAD_MAX_BYTES_DEFAULT': 'admission',
+    'UPLOAD_MAX_BYTES_ENV': 'admission',
+    'UPLOAD_MAX_ROWS_DEFAULT': 'admission',
+    'UPLOAD_MAX_ROWS_ENV': 'admission',
+    'Limiter': 'admission',
+    'check_upload': 'admission',
+    'int_from_env': 'admission',
+    'reporting_progress': 'instrument',
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value  # 之後直接取用，不再經過 __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,7 @@
+import sys
+
+from .cli import main
+
+# 子行程 (spawn/forkserver) 會重新匯入這個模組，不能在匯入時就執行
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+整台伺服器共用的流量控制：限制同時解析 Excel 的數量，並在解析前擋下過大的上傳檔。
+
+上限都可以用環境變數調整：
+LABELGEN_PARSE_WORKERS (同時解析數)、LABELGEN_UPLOAD_MAX_BYTES、LABELGEN_UPLOAD_MAX_ROWS。
+同時生成的數量由 jobs.JobQueue 限制 (LABELGEN_JOB_WORKERS)。
+"""
+from collections import deque
+from contextlib import contextmanager
+import os
+import threading
+
+from .excel import HEADER_SEARCH_ROWS, UploadTooLarge, sheet_filled_rows, sheet_row_count
+
+PARSE_WORKERS_ENV = 'LABELGEN_PARSE_WORKERS'
+UPLOAD_MAX_BYTES_ENV = 'LABELGEN_UPLOAD_MAX_BYTES'
+UPLOAD_MAX_ROWS_ENV = 'LABELGEN_UPLOAD_MAX_ROWS'
+
+PARSE_WORKERS_DEFAULT = 2
+UPLOAD_MAX_BYTES_DEFAULT = 20 * 1024 * 1024
+UPLOAD_MAX_ROWS_DEFAULT = 200_000
+
+# 排隊時多久重新檢查一次順位 (秒)
+LIMITER_POLL_SECONDS = 0.5
+
+def int_from_env(name, default):
+    """讀取正整數的環境變數，未設定時回傳 default"""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    number = int(value)
+    if number < 1:
+        raise ValueError(f"{name} 必須大於 0：{value}")
+    return number
+
+class Limiter:
+    """最多 limit 個同時進行，其餘依先來後到排隊；多個 session (執行緒) 共用一個"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._active = 0
+        self._queue = deque()
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, on_wait=None):
+        """
+        取得一個名額，區塊結束時歸還。
+
+        需要排隊時，順位 (1 表示下一個) 改變就呼叫 on_wait(position)；
+        on_wait 在鎖外呼叫，可以放心更新畫面。
+        """
+        ticket = object()
+        with self._cond:
+            self._queue.append(ticket)
+        try:
+            reported = None
+            while True:
+                with self._cond:
+                    if self._queue[0] is ticket and self._active < self.limit:
+                        self._queue.popleft()
+                        self._active += 1
+                        break
+                    position = self._queue.index(ticket) + 1
+                    if position == reported or on_wait is None:
+                        self._cond.wait(LIMITER_POLL_SECONDS)
+                        continue
+                reported = position
+                on_wait(position)
+        except BaseException:
+            # 排隊中被中斷 (例如 Streamlit 重跑)，讓出順位給後面的人
+            with self._cond:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+            raise
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+def check_upload(file, size, max_bytes=None, max_rows=None):
+    """
+    解析前先檢查上傳檔：超過位元組上限，或第一張工作表的資料明顯超過列數上限時丟出 UploadTooLarge。
+
+    工作表開頭的 <dimension> 是使用範圍，含標題列以上的列與只有格式的空白儲存格 (例如整欄設了格式)，
+    只當粗略的上限：範圍在 max_rows + HEADER_SEARCH_ROWS 以內就直接通過，超過時才數有值的列，
+    確定超過才擋下。精確的上限留給 load_excel_with_auto_header(max_rows=...) 在讀取途中檢查。
+    """
+    max_bytes = max_bytes or int_from_env(UPLOAD_MAX_BYTES_ENV, UPLOAD_MAX_BYTES_DEFAULT)
+    max_rows = max_rows or int_from_env(UPLOAD_MAX_ROWS_ENV, UPLOAD_MAX_ROWS_DEFAULT)
+    if size > max_bytes:
+        raise UploadTooLarge(f"檔案大小 {size / 2 ** 20:.1f} MB 超過上限 {max_bytes / 2 ** 20:.1f} MB")
+    limit = max_rows + HEADER_SEARCH_ROWS
+    rows = sheet_row_count(file)
+    if rows is None or rows <= limit:
+        return
+    filled = sheet_filled_rows(file, limit=limit)
+    if filled is not None and filled > limit:
+        raise UploadTooLarge(f"工作表的資料超過上限 {max_rows:,} 列")
@@ -0,0 +1,89 @@
+"""
+分冊輸出：把標籤拆成每份 N 頁的 .docx，逐份寫進同一個 ZIP。
+
+上萬頁的單一表格 Word 幾乎打不開，分冊後每份都能正常開啟、列印。
+"""
+import itertools
+import shutil
+import tempfile
+import time
+import zipfile
+
+from .generate import ENGINE_OOXML, write_word_doc
+from .instrument import progress_span, reporting_progress
+from .layout import DEFAULT_LAYOUT
+from .ooxml_engine import SPOOL_MAX_BYTES
+from .records import iter_label_records
+
+# 預設每份的頁數
+BUNDLE_PAGES_PER_FILE = 500
+BUNDLE_FILE_NAME = '標籤_{index:03d}_第{first_page}-{last_page}頁.docx'
+
+def write_label_bundle(df, fileobj, pages_per_file=BUNDLE_PAGES_PER_FILE, engine=ENGINE_OOXML, workers=None,
+                       progress=None, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """
+    每 pages_per_file 頁產生一份 .docx，依序寫進 fileobj 的 ZIP，回傳份數。
+
+    一次只生成一份，記憶體用量以一份為上限。.docx 本身已經壓縮，ZIP 內不再壓縮 (ZIP_STORED)。
+    progress 收到的是全部標籤的進度，不是各份各自從 0 算起。
+    """
+    with reporting_progress(progress):
+        count, _ = write_record_bundle(
+            iter_label_records(df), fileobj, pages_per_file=pages_per_file, engine=engine, workers=workers,
+            table_per_page=table_per_page, layout=layout, total=len(df),
+        )
+    return count
+
+def write_record_bundle(records, fileobj, pages_per_file=BUNDLE_PAGES_PER_FILE, engine=ENGINE_OOXML, workers=None,
+                        table_per_page=False, layout=DEFAULT_LAYOUT, total=None):
+    """
+    與 write_label_bundle 相同，但直接從 (姓名, 地址) 的 iterable 逐份讀取，回傳 (份數, 標籤數)。
+
+    records 可以是 excel.iter_excel_records 的串流：每份先寫到暫存檔，寫完才知道頁數、
+    放進 ZIP，不必預先知道總筆數。total 為預估筆數 (未知時為 None)，只用於進度。
+    """
+    if pages_per_file < 1:
+        raise ValueError(f"每份頁數必須大於 0：{pages_per_file}")
+
+    labels_per_page = layout.labels_per_page
+    labels_per_file = pages_per_file * labels_per_page
+    date_time = time.localtime()[:6]
+    records = iter(records)
+    count = done = 0
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_STORED) as zf:
+        for first in records:
+            part = itertools.chain([first], itertools.islice(records, labels_per_file - 1))
+            with progress_span(done, total), \
+                    tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as docx_file:
+                labels = write_word_doc(
+                    part, docx_file, engine=engine, workers=workers, table_per_page=table_per_page, layout=layout,
+                    total=None if total is None else min(labels_per_file, total - done),
+                )
+                first_page = done // labels_per_page + 1
+                last_page = first_page + (labels - 1) // labels_per_page
+                count += 1
+                info = zipfile.ZipInfo(
+                    BUNDLE_FILE_NAME.format(index=count, first_page=first_page, last_page=last_page),
+                    date_time=date_time,
+                )
+                docx_file.seek(0)
+                with zf.open(info, 'w') as member:
+                    shutil.copyfileobj(docx_file, member)
+            done += labels
+    return count, done
+
+def generate_label_bundle(df, pages_per_file=BUNDLE_PAGES_PER_FILE, engine=ENGINE_OOXML, workers=None,
+                          progress=None, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """
+    產生分冊 ZIP，回傳已 seek(0) 的 SpooledTemporaryFile (超過 SPOOL_MAX_BYTES 時落在磁碟上)。
+    用完請自行 close()。
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        write_label_bundle(df, output, pages_per_file=pages_per_file, engine=engine, workers=workers,
+                           progress=progress, table_per_page=table_per_page, layout=layout)
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output
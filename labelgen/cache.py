@@ -0,0 +1,47 @@
+"""生成結果快取：同樣的名單與版面設定不必重新排版。"""
+from collections import OrderedDict
+import hashlib
+import threading
+
+from .layout import DEFAULT_LAYOUT, layout_signature
+from .records import clean_label_records
+
+class DocumentCache:
+    """以總位元組數為上限的 LRU 快取，多個 session 共用，因此加鎖保護"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        # 單一檔案就超過上限時不快取，以免把其他項目全部擠掉
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= len(old)
+            self._entries[key] = data
+            self._total_bytes += len(data)
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+def label_cache_key(df, layout=DEFAULT_LAYOUT):
+    """以清理後的 (姓名, 通訊地址) 內容與 layout 的版面參數計算快取鍵"""
+    # 各引擎的輸出逐位元組相同，所以引擎不列入鍵值
+    digest = hashlib.sha256(repr(layout_signature(layout)).encode('utf-8'))
+    for values in clean_label_records(df):
+        # \x1e 是 XML 不允許的字元，不會出現在可輸出的資料中，可安全當分隔符號
+        digest.update(b'\x1d')
+        digest.update('\x1e'.join(values).encode('utf-8'))
+    return digest.hexdigest()
@@ -0,0 +1,153 @@
+"""
+命令列批次產生標籤，不需要 Streamlit。
+
+    python -m labelgen 名單.xlsx
+    python -m labelgen 名單資料夾/ 另一份.xlsx -o 輸出/ --engine python-docx
+    python -m labelgen 年終寄件.xlsx --engine ooxml-parallel --workers 16
+    python -m labelgen 年終寄件.xlsx --pages-per-file 500
+    python -m labelgen 年終寄件.xlsx --table-per-page
+    python -m labelgen 名單.xlsx --layout avery-l7163
+    python -m labelgen 名單.xlsx --pdf --pdf-font C:\\Windows\\Fonts\\kaiu.ttf
+    python -m labelgen 名單.xlsx --reader calamine
+
+每個 .xlsx 會產生一份「<檔名>_標籤.docx」；指定 --pages-per-file 時改為分冊的
+「<檔名>_標籤.zip」，指定 --pdf 時改為「<檔名>_標籤.pdf」。任何一個檔案失敗時結束代碼為 1。
+
+名單從工作表一路串流寫進輸出檔，預設以 openpyxl 逐列讀取，記憶體只需要幾頁，與筆數無關。
+--reader calamine 讀取快好幾倍，但開檔時會把整張工作表讀進記憶體 (50 萬列約 300 MB)。
+"""
+import argparse
+from contextlib import nullcontext
+import logging
+import os
+import sys
+import time
+
+from .bundle import write_record_bundle
+from .excel import READER_OPENPYXL, READERS, iter_excel_records
+from .generate import ENGINE_OOXML, ENGINES, write_word_doc
+from .instrument import recording
+from .layout import DEFAULT_LAYOUT, LAYOUT_DEFAULT, LAYOUT_PRESETS
+from .pdf_engine import PDF_FONT_ENV, write_label_pdf
+
+OUTPUT_SUFFIX = '_標籤.docx'
+BUNDLE_OUTPUT_SUFFIX = '_標籤.zip'
+PDF_OUTPUT_SUFFIX = '_標籤.pdf'
+
+def iter_input_files(paths):
+    """展開輸入：檔案照原樣回傳，資料夾則列出其中的 .xlsx (不遞迴)"""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for name in sorted(os.listdir(path)):
+            # 略過 Excel 開檔時產生的 ~$ 鎖定檔
+            if name.lower().endswith('.xlsx') and not name.startswith('~$'):
+                yield os.path.join(path, name)
+
+def output_path_for(input_path, output_dir=None, suffix=OUTPUT_SUFFIX):
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    directory = output_dir or os.path.dirname(input_path)
+    return os.path.join(directory, stem + suffix)
+
+def convert_file(input_path, output_path, engine=ENGINE_OOXML, reader=READER_OPENPYXL, workers=None,
+                 pages_per_file=None, pdf=False, pdf_font=None, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """
+    將一份 Excel 依 layout 版面轉成標籤 .docx (指定 pages_per_file 時為分冊 ZIP，pdf 為真時為 PDF)，
+    回傳標籤筆數。
+
+    無法讀取或缺少必要欄位時拋出 ValueError。先寫到 .part 檔，完成後才改名，
+    中途失敗不會留下不完整的輸出。
+
+    名單不會載入成 DataFrame：資料列從工作表一路串流經過清理 (excel.iter_excel_records) 寫進輸出檔，
+    OOXML 引擎與 PDF 的記憶體只需要幾頁，與筆數無關。reader 預設為逐列讀取的 openpyxl；
+    calamine 較快，但會先把整張工作表讀進記憶體。
+    """
+    with open(input_path, 'rb') as f:
+        records = iter_excel_records(f, reader=reader)
+        partial_path = output_path + '.part'
+        try:
+            with open(partial_path, 'wb') as out:
+                if pdf:
+                    count = write_label_pdf(records, out, font_path=pdf_font, layout=layout)
+                elif pages_per_file:
+                    _, count = write_record_bundle(
+                        records, out, pages_per_file=pages_per_file, engine=engine, workers=workers,
+                        table_per_page=table_per_page, layout=layout,
+                    )
+                else:
+                    count = write_word_doc(
+                        records, out, engine=engine, workers=workers, table_per_page=table_per_page, layout=layout,
+                    )
+            os.replace(partial_path, output_path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m labelgen',
+        description='將會員名單 Excel 批次轉成 A4 2x8 標籤 Word 檔。',
+    )
+    parser.add_argument('inputs', nargs='+', metavar='INPUT', help='.xlsx 檔案或包含 .xlsx 的資料夾')
+    parser.add_argument('-o', '--output-dir', help='輸出資料夾 (預設與各輸入檔相同)')
+    parser.add_argument('--engine', choices=list(ENGINES), default=ENGINE_OOXML, help='生成引擎 (預設 %(default)s)')
+    parser.add_argument('--reader', choices=READERS, default=READER_OPENPYXL,
+                        help='Excel 讀取引擎 (預設 %(default)s，逐列讀取、記憶體固定)；'
+                             'calamine 快好幾倍但整張表讀進記憶體，auto 為有安裝 calamine 就用 calamine')
+    parser.add_argument('--workers', type=int, help='ooxml-parallel 引擎的子行程數 (預設為 CPU 核心數)')
+    parser.add_argument('--pages-per-file', type=int, metavar='N', help='每 N 頁分成一份 .docx，全部打包成一個 ZIP')
+    parser.add_argument('--layout', choices=list(LAYOUT_PRESETS), default=LAYOUT_DEFAULT,
+                        help='標籤紙版面 (預設 %(default)s)：' + '、'.join(
+                            f'{key} = {layout.title}' for key, layout in LAYOUT_PRESETS.items()
+                        ))
+    parser.add_argument('--table-per-page', action='store_true',
+                        help='每頁一個表格並明確分頁，頁數多時 Word 開檔較快 (標籤位置不變)')
+    parser.add_argument('--pdf', action='store_true', help='直接輸出 PDF (需安裝 reportlab)')
+    parser.add_argument('--pdf-font', metavar='PATH', help=f'PDF 內嵌的中文 TrueType 字型 (預設讀取環境變數 {PDF_FONT_ENV})')
+    parser.add_argument('--profile', action='store_true', help='在 stderr 以 JSON 逐行輸出各階段的耗時與記憶體')
+    args = parser.parse_args(argv)
+    if args.pages_per_file is not None and args.pages_per_file < 1:
+        parser.error("--pages-per-file 必須大於 0")
+    if args.pdf and args.pages_per_file:
+        parser.error("--pdf 不能與 --pages-per-file 同時使用")
+
+    input_files = list(iter_input_files(args.inputs))
+    if not input_files:
+        parser.error("找不到任何 .xlsx 檔案")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    if args.profile:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        profile_logger = logging.getLogger('labelgen.instrument')
+        profile_logger.addHandler(handler)
+        profile_logger.setLevel(logging.INFO)
+
+    if args.pdf:
+        suffix = PDF_OUTPUT_SUFFIX
+    elif args.pages_per_file:
+        suffix = BUNDLE_OUTPUT_SUFFIX
+    else:
+        suffix = OUTPUT_SUFFIX
+    failures = 0
+    for input_path in input_files:
+        output_path = output_path_for(input_path, args.output_dir, suffix)
+        start = time.perf_counter()
+        profiling = recording(file=input_path, engine=args.engine) if args.profile else nullcontext()
+        try:
+            with profiling:
+                count = convert_file(
+                    input_path, output_path, engine=args.engine, reader=args.reader, workers=args.workers,
+                    pages_per_file=args.pages_per_file, pdf=args.pdf, pdf_font=args.pdf_font,
+                    table_per_page=args.table_per_page, layout=LAYOUT_PRESETS[args.layout],
+                )
+        except (ImportError, OSError, ValueError) as e:
+            failures += 1
+            print(f"✗ {input_path}：{e}", file=sys.stderr)
+            continue
+        print(f"✓ {input_path} → {output_path} ({count} 筆，{time.perf_counter() - start:.2f} 秒)")
+
+    return 1 if failures else 0
@@ -0,0 +1,111 @@
+"""
+樣板複製引擎。
+
+先用 python-docx 排好一格完整格式的標籤，組成一整頁 (layout.rows 列) 的樣板，
+之後每頁直接複製樣板的 XML，只替換姓名與地址的文字節點，
+不再逐格呼叫 add_paragraph / add_run 重複做同樣的格式設定。
+輸出與 python-docx 引擎逐位元組相同，產生的仍是 python-docx 的 Document。
+"""
+from copy import deepcopy
+import itertools
+import re
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+from .docx_engine import (
+    add_label_table, add_page_break, check_table_per_page, fill_label_cell, generate_with_python_docx,
+    new_label_document, shrink_last_paragraph,
+)
+from .instrument import track
+from .layout import DEFAULT_LAYOUT
+
+# 樣板中姓名、地址的暫存文字，複製後一定會被換掉
+_PLACEHOLDER = '#'
+# run.text 會把 Tab 與換行轉成 <w:tab/>、<w:br/>，含這些字元時交給 python-docx 處理
+_SPECIAL_CHARS = re.compile('[\t\r\n]')
+
+def _page_prototype(doc, layout):
+    """
+    在 doc 中建立空表格，回傳 (表格 XML, 一列的樣板, 空白格樣板)。
+
+    列樣板的每一格都已排好姓名與地址兩段，各有一個 <w:t>；空白格與 python-docx 引擎
+    最後不足一列時留下的格子相同。
+    """
+    table, rows = add_label_table(doc, 1, layout)
+    row = rows[0]
+    empty_cell = deepcopy(row.cells[-1]._tc)
+    for cell in row.cells:
+        fill_label_cell(cell, _PLACEHOLDER, _PLACEHOLDER, layout)
+    table._tbl.remove(row._tr)
+    return table._tbl, row._tr, empty_cell
+
+def _set_text(t, text):
+    """把樣板中的 <w:t> 換成 text；比照 python-docx，空字串時整個 run 拿掉"""
+    r = t.getparent()
+    if not text:
+        r.getparent().remove(r)
+    elif _SPECIAL_CHARS.search(text):
+        r.text = text
+    else:
+        t.text = text
+        if len(text.strip()) < len(text):
+            t.set(qn('xml:space'), 'preserve')
+
+def _fill_rows(rows, records, empty_cell, cols):
+    """把 records 依序填進複製出來的列 (每列 cols 格)；最後幾格沒有資料時換成空白格"""
+    texts = [t for tr in rows for t in tr.iter(qn('w:t'))]
+    for i, (name, raw_address) in enumerate(records):
+        _set_text(texts[2 * i], f"{name} 君收" if name else '')
+        _set_text(texts[2 * i + 1], raw_address)
+    if len(records) % cols:
+        last_row = rows[-1]
+        for tc in last_row.findall(qn('w:tc'))[len(records) % cols:]:
+            last_row.replace(tc, deepcopy(empty_cell))
+
+def build_label_document_cloned(records, table_per_page=False, layout=DEFAULT_LAYOUT,
+                                new_document=new_label_document):
+    """
+    以整頁樣板複製的方式建立表格，回傳尚未存檔的 Document；records 為 (姓名, 地址) 的 list。
+
+    table_per_page、layout 與 new_document 與 docx_engine.build_label_document 相同。
+    """
+    if table_per_page:
+        check_table_per_page(layout)
+    doc = new_document(layout)
+    tbl, row_prototype, empty_cell = _page_prototype(doc, layout)
+    labels_per_page = layout.labels_per_page
+    # 一整頁的列放在一個暫時的容器裡，每頁只要複製一次
+    page_prototype = OxmlElement('w:tbl')
+    page_prototype.extend(deepcopy(row_prototype) for _ in range(layout.rows))
+    if table_per_page:
+        # 空表格 (只有表格屬性與欄寬) 與分頁段落的樣板
+        table_prototype = deepcopy(tbl)
+        page_break = add_page_break(doc)._p
+        page_break.getparent().remove(page_break)
+
+    records = iter(track(records, total=len(records)))
+    for i in itertools.count():
+        page = list(itertools.islice(records, labels_per_page))
+        if not page:
+            break
+        if i and table_per_page:
+            separator = deepcopy(page_break)
+            tbl.addnext(separator)
+            tbl = deepcopy(table_prototype)
+            separator.addnext(tbl)
+        if len(page) == labels_per_page:
+            rows = list(deepcopy(page_prototype))
+        else:
+            rows = [deepcopy(row_prototype) for _ in range(-(-len(page) // layout.cols))]
+        _fill_rows(rows, page, empty_cell, layout.cols)
+        tbl.extend(rows)
+
+    shrink_last_paragraph(doc)
+    return doc
+
+def generate_with_python_docx_clone(df, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """以整頁樣板複製的方式建立表格並存檔"""
+    return generate_with_python_docx(
+        df, build=build_label_document_cloned, table_per_page=table_per_page, layout=layout,
+    )
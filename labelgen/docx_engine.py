@@ -0,0 +1,228 @@
+"""python-docx 引擎：透過 python-docx 的物件模型逐格建立標籤表格。"""
+from copy import deepcopy
+from functools import lru_cache
+from io import BytesIO
+
+from docx import Document
+from docx.enum.section import WD_ORIENT
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.table import WD_ROW_HEIGHT_RULE
+from docx.enum.text import WD_LINE_SPACING
+from docx.oxml.ns import qn
+from docx.shared import Cm, Pt
+from docx.text.paragraph import Paragraph
+
+from .instrument import stage, track
+from .layout import ADDRESS_STYLE, DEFAULT_LAYOUT, LAYOUT_CACHE_SIZE, NAME_STYLE, PAGE_BREAK_LINE_HEIGHT
+from .records import iter_label_records
+
+# python-docx 以去掉空白的樣式名稱當 styleId
+NAME_STYLE_ID = NAME_STYLE.replace(' ', '')
+ADDRESS_STYLE_ID = ADDRESS_STYLE.replace(' ', '')
+
+def add_label_style(doc, name, indent, space_before, space_after, size, bold, layout=DEFAULT_LAYOUT):
+    """新增標籤用的段落樣式：縮排、段距、中西文字型 (取自 layout)、字級與粗細都定義在樣式中"""
+    style = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+    style.base_style = doc.styles['Normal']
+
+    fmt = style.paragraph_format
+    fmt.left_indent = indent
+    fmt.space_before = space_before
+    fmt.space_after = space_after
+    fmt.line_spacing_rule = WD_LINE_SPACING.SINGLE
+
+    style.font.name = layout.latin_font
+    style.element.rPr.rFonts.set(qn('w:eastAsia'), layout.east_asia_font)
+    style.font.size = Pt(size)
+    style.font.bold = bold
+    return style
+
+def fill_label_cell(cell, name, raw_address, layout=DEFAULT_LAYOUT):
+    """將一筆姓名/地址排入單一標籤儲存格"""
+    # 確保儲存格寬度
+    cell.width = layout.label_width
+
+    cell.vertical_alignment = 1 # 垂直置中
+    cell._element.clear_content()
+
+    # --- 排版內容 ---
+    # 格式都在 NAME_STYLE / ADDRESS_STYLE 樣式中 (見 new_label_document)，這裡只引用樣式。
+    # 直接寫入 styleId：paragraph.style = 名稱 每次都要在 styles.xml 中搜尋一遍
+
+    # 1. 姓名行
+    p1 = cell.add_paragraph()
+    p1._p.style = NAME_STYLE_ID
+    if name:
+        p1.add_run(f"{name} 君收")
+
+    # 2. 地址行 (直接使用原始地址，不拆分，不加 950(950) 那一行)
+    p2 = cell.add_paragraph()
+    p2._p.style = ADDRESS_STYLE_ID
+    if raw_address:
+        # 直接印出 raw_address (也就是 Excel 裡的 (950)臺東縣...)
+        p2.add_run(raw_address)
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _base_label_document(layout=DEFAULT_LAYOUT):
+    """母版：每種版面只解析一次 python-docx 預設樣板，套用版面與樣式後給 new_label_document 複製"""
+    doc = Document()
+    
+    # --- 版面設定：預設為 A4 滿版零邊界 ---
+    section = doc.sections[0]
+    if layout.page_width > layout.page_height:
+        section.orientation = WD_ORIENT.LANDSCAPE
+    section.page_height = layout.page_height
+    section.page_width = layout.page_width
+    section.top_margin = layout.margin_top
+    section.bottom_margin = Cm(0)
+    section.left_margin = layout.margin_left
+    section.right_margin = Cm(0)
+    section.header_distance = Cm(0)
+    section.footer_distance = Cm(0)
+
+    # --- 標籤樣式：字型只在 styles.xml 定義一次，不必每個 run 重複設定 ---
+    add_label_style(
+        doc, NAME_STYLE, layout.name_indent, layout.name_space_before, layout.name_space_after,
+        layout.name_font_size, bold=True, layout=layout,
+    )
+    add_label_style(
+        doc, ADDRESS_STYLE, layout.address_indent, Pt(0), Pt(0), layout.address_font_size, bold=False,
+        layout=layout,
+    )
+    return doc
+
+def new_label_document(layout=DEFAULT_LAYOUT):
+    """
+    建立已套用 layout 頁面設定 (預設為 A4 滿版零邊界)、並定義好姓名與地址樣式的空白文件。
+
+    從母版完整複製，與其他文件互不影響，樣式、文件屬性等都可以自由修改。
+    """
+    return deepcopy(_base_label_document(layout))
+
+def _new_shared_document(layout=DEFAULT_LAYOUT):
+    """
+    new_label_document 的快速版：只複製 document.xml，styles.xml 等其他零件與母版共用。
+
+    只給引擎排版後直接以 save_label_document 存檔，文件不會交給呼叫端，共用的零件不會被改到。
+    """
+    base = _base_label_document(layout)
+    shared = {id(part): part for part in base.part.package.iter_parts() if part is not base.part}
+    return deepcopy(base, shared)
+
+def add_label_table(doc, rows_needed, layout=DEFAULT_LAYOUT):
+    """加入 layout.cols 欄 x rows_needed 列的無框線表格，欄寬與列高固定；回傳 (table, 列清單)"""
+    table = doc.add_table(rows=rows_needed, cols=layout.cols)
+    
+    # --- 無框線設定 (不套用 Table Grid) ---
+    # table.style = 'Table Grid'  <-- 這一行已移除
+    
+    # --- 2. 強制寬度填滿 ---
+    table.autofit = False 
+    table.allow_autofit = False
+    
+    # 強制設定每一欄的寬度 (預設 10.5cm)
+    for col in table.columns:
+        col.width = layout.label_width
+
+    # 列清單只建立一次，之後依序走訪每一格。
+    # (table.rows[r] 每次呼叫都會重建整份列清單，逐筆索引會讓大量資料變成 O(n²))
+    rows = list(table.rows)
+    for row in rows:
+        # 設定高度
+        row.height_rule = WD_ROW_HEIGHT_RULE.EXACTLY
+        row.height = layout.label_height
+    return table, rows
+
+def add_page_break(doc):
+    """
+    在文件結尾插入分頁 (下一頁開始的分節符號)，回傳放分節設定的段落。
+
+    段落固定只有 PAGE_BREAK_LINE_HEIGHT 高，塞得進最後一列標籤下方剩下的空間 (預設版面為 0.1cm，
+    見 LabelLayout.page_break_fits)，下一頁的表格仍從頁首開始，標籤位置與單一大表格時完全相同。
+    """
+    sectPr = doc.element.body.add_section_break()
+    paragraph = Paragraph(sectPr.getprevious(), doc._body)
+    fmt = paragraph.paragraph_format
+    fmt.space_before = Pt(0)
+    fmt.space_after = Pt(0)
+    fmt.line_spacing = PAGE_BREAK_LINE_HEIGHT
+    return paragraph
+
+def split_pages(records, table_per_page, labels_per_page=DEFAULT_LAYOUT.labels_per_page):
+    """table_per_page 時把 records 切成每頁一份 (至少一份)，否則整份當成一頁"""
+    if not table_per_page or len(records) <= labels_per_page:
+        return [records]
+    return [records[i:i + labels_per_page] for i in range(0, len(records), labels_per_page)]
+
+def check_table_per_page(layout):
+    """版面最後一列下方放不下分頁段落時，每頁一個表格會多出空白頁，丟出 ValueError"""
+    if not layout.page_break_fits:
+        raise ValueError(f"{layout.title}：最後一列下方沒有空間放分頁，無法每頁一個表格")
+
+def shrink_last_paragraph(doc):
+    """縮小表格後的最後游標"""
+    try:
+        last_paragraph = doc.paragraphs[-1]
+        # 每頁一個表格時，最後一段可能是 add_page_break 的分頁段落，不是游標
+        pPr = last_paragraph._p.pPr
+        if pPr is not None and pPr.sectPr is not None:
+            return
+        last_paragraph.paragraph_format.space_after = Pt(0)
+        last_paragraph.paragraph_format.line_spacing = Pt(0)
+        run = last_paragraph.add_run()
+        run.font.size = Pt(1)
+    except:
+        pass
+
+def build_label_document(records, table_per_page=False, layout=DEFAULT_LAYOUT, new_document=new_label_document):
+    """
+    以 python-docx 逐格建立表格，回傳尚未存檔的 Document；records 為 (姓名, 地址) 的 list。
+
+    table_per_page 時每頁一個表格 (預設版面為 2x8)，表格之間以 add_page_break 分頁；
+    否則整份名單是一個大表格。兩者印出來的標籤位置相同。
+    new_document 為 layout -> 空白文件的函式，預設的 new_label_document 建立的文件可以自由修改。
+    """
+    if table_per_page:
+        check_table_per_page(layout)
+    doc = new_document(layout)
+    total_items = len(records)
+
+    # 建立表格 (layout.cols 欄 x N列)
+    rows = []
+    for i, page in enumerate(split_pages(records, table_per_page, layout.labels_per_page)):
+        if i:
+            add_page_break(doc)
+        rows_needed = -(-len(page) // layout.cols)
+        rows.extend(add_label_table(doc, rows_needed, layout)[1])
+
+    # --- 3. 填入資料 ---
+    cells = (cell for row in rows for cell in row.cells)
+
+    # records 放在前面，zip 才會把它讀到底 (最後一次進度才會被記錄)
+    for (name, raw_address), cell in zip(track(records, total=total_items), cells):
+        fill_label_cell(cell, name, raw_address, layout)
+
+    # --- 4. 縮小最後游標 ---
+    shrink_last_paragraph(doc)
+    return doc
+
+def write_with_python_docx(records, fileobj, build=build_label_document, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """
+    以 python-docx 建立表格並存檔到 fileobj；records 為 (姓名, 地址) 的 list，
+    build 為 (records, table_per_page, layout, new_document) -> Document 的排版函式
+    """
+    with stage('build', labels=len(records)):
+        # 排好就存檔、不交給呼叫端，可以與母版共用零件，存檔時只需序列化 document.xml
+        doc = build(records, table_per_page=table_per_page, layout=layout, new_document=_new_shared_document)
+    from .ooxml_engine import save_label_document
+    with stage('save') as record:
+        save_label_document(doc, fileobj, layout)
+        record['bytes'] = fileobj.tell()
+
+def generate_with_python_docx(df, build=build_label_document, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """以 python-docx 建立表格並存檔，回傳已 seek(0) 的 BytesIO；build 見 write_with_python_docx"""
+    buffer = BytesIO()
+    write_with_python_docx(list(iter_label_records(df)), buffer, build=build, table_per_page=table_per_page,
+                           layout=layout)
+    buffer.seek(0)
+    return buffer
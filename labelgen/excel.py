@@ -0,0 +1,307 @@
+"""
+Excel 讀取：自動偵測標題列，只載入標籤需要的欄位。
+
+pandas 匯入很慢 (約 0.5 秒)，只在真正建立 DataFrame 時才匯入；
+iter_excel_records 不建立 DataFrame，直接逐筆產生清理過的標籤資料。
+
+讀取引擎的取捨：calamine 最快，但開檔時就把整張工作表讀進記憶體 (50 萬列約 300 MB)；
+openpyxl 唯讀模式逐列解析，記憶體固定但慢好幾倍。串流處理要限制記憶體時請指定 READER_OPENPYXL
+(命令列預設如此)，READER_AUTO 則以速度優先。
+"""
+from datetime import date, datetime
+import itertools
+import posixpath
+import re
+import zipfile
+from xml.etree import ElementTree
+
+from .instrument import stage
+from .records import clean_label_text
+
+# 標題列只在前幾列中搜尋，以及標題列必須包含的欄位
+HEADER_SEARCH_ROWS = 20
+REQUIRED_COLUMNS = ('姓名', '通訊地址')
+
+# --- Excel 讀取引擎 ---
+READER_AUTO = 'auto'
+READER_CALAMINE = 'calamine'  # 需另外安裝 python-calamine
+READER_OPENPYXL = 'openpyxl'  # openpyxl 唯讀串流模式
+READER_PANDAS = 'pandas'      # pd.read_excel 預設路徑 (最慢，但行為與舊版完全相同)
+READERS = (READER_AUTO, READER_CALAMINE, READER_OPENPYXL, READER_PANDAS)
+
+class UploadTooLarge(ValueError):
+    """上傳檔超過允許的大小或列數"""
+
+def _is_blank(value):
+    return value is None or value == '' or value != value  # value != value 代表 NaN
+
+def is_header_row(row):
+    """此列是否同時包含所有必要欄位"""
+    row_values = [str(val).strip() for val in row]
+    return all(col in row_values for col in REQUIRED_COLUMNS)
+
+def _column_names(header_values):
+    """比照 pandas read_excel(header=...) 的規則命名欄位：空白為 Unnamed: i，重複加上 .1、.2"""
+    import pandas as pd
+    names = []
+    seen = {}
+    for i, val in enumerate(header_values):
+        name = f"Unnamed: {i}" if pd.isna(val) else val
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        while count and f"{name}.{count}" in seen:
+            count += 1
+        if count:
+            name = f"{name}.{count}"
+            seen[name] = 1
+        names.append(name)
+    return names
+
+def _cell_to_str(value):
+    """比照 pd.read_excel(dtype=str) 把儲存格的值轉成字串，空白儲存格回傳 NaN"""
+    if _is_blank(value):
+        return float('nan')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, date) and not isinstance(value, datetime):
+        # calamine 對純日期回傳 date，pandas 則一律轉成含時間的 Timestamp
+        value = datetime(value.year, value.month, value.day)
+    return str(value)
+
+def _open_rows_calamine(file):
+    from python_calamine import CalamineWorkbook
+    sheet = CalamineWorkbook.from_filelike(file).get_sheet_by_index(0)
+    # iter_rows 會保留開頭的空白列，但會略過開頭的空白欄，要自行補回
+    leading = [None] * (sheet.start[1] if sheet.start else 0)
+    if not leading:
+        return sheet.iter_rows()
+    return (leading + row for row in sheet.iter_rows())
+
+def _open_rows_openpyxl(file):
+    import openpyxl
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+
+    def rows():
+        try:
+            yield from wb.worksheets[0].iter_rows(values_only=True)
+        finally:
+            wb.close()
+    return rows()
+
+def _open_rows_pandas(file):
+    import pandas as pd
+    return pd.read_excel(file, header=None, dtype=str).itertuples(index=False, name=None)
+
+_ROW_READERS = {
+    READER_CALAMINE: _open_rows_calamine,
+    READER_OPENPYXL: _open_rows_openpyxl,
+    READER_PANDAS: _open_rows_pandas,
+}
+
+def _calamine_available():
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def iter_raw_rows(file, reader=READER_AUTO):
+    """
+    逐列讀出第一張工作表的原始儲存格值 (尚未轉成字串)。
+
+    reader 為 READER_AUTO 時，有安裝 python-calamine 就用 calamine，
+    否則 (或 calamine 開檔失敗時) 改用 openpyxl 唯讀模式。
+    """
+    if reader == READER_AUTO:
+        candidates = [READER_CALAMINE, READER_OPENPYXL] if _calamine_available() else [READER_OPENPYXL]
+    elif reader in _ROW_READERS:
+        candidates = [reader]
+    else:
+        raise ValueError(f"未知的 Excel 讀取引擎：{reader}")
+
+    for i, name in enumerate(candidates):
+        try:
+            file.seek(0)
+            return _ROW_READERS[name](file)
+        except Exception:
+            if i == len(candidates) - 1:
+                raise
+
+# --- 不解析整張表就取得列數 ---
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+_DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\b[^>]*\bref="(?:[^"]*:)?[A-Z]*(\d+)"')
+# <dimension> 在工作表 XML 的開頭，只需要讀這麼多
+_DIMENSION_SEARCH_BYTES = 64 * 1024
+# 數有值的列：每列的結尾，以及有值的儲存格 (<v> 有內容或 inline 字串)
+_ROW_END_RE = re.compile(rb'</(?:\w+:)?row>')
+_CELL_VALUE_RE = re.compile(rb'<(?:\w+:)?(?:v>[^<]|is>)')
+_SCAN_CHUNK_BYTES = 1024 * 1024
+
+def _first_sheet_name(zf):
+    """第一張工作表在 xlsx 中的檔名"""
+    sheet = ElementTree.fromstring(zf.read('xl/workbook.xml')).find(f'{_MAIN_NS}sheets/{_MAIN_NS}sheet')
+    rels = ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    target = next(rel.get('Target') for rel in rels.iter(_PKG_REL) if rel.get('Id') == sheet.get(_REL_ID))
+    return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+
+def sheet_row_count(file):
+    """
+    從第一張工作表開頭的 <dimension ref="A1:F5000"> 讀出列數 (含標題列之前的列)，不必解析整張表。
+
+    這是工作表的使用範圍，只有格式的空白儲存格也算在內，只能當作資料列數的上限。
+    不是 xlsx、或工作表沒有寫範圍時回傳 None。
+    """
+    try:
+        file.seek(0)
+        with zipfile.ZipFile(file) as zf:
+            with zf.open(_first_sheet_name(zf)) as f:
+                match = _DIMENSION_RE.search(f.read(_DIMENSION_SEARCH_BYTES))
+    except (zipfile.BadZipFile, KeyError, AttributeError, StopIteration, ElementTree.ParseError):
+        return None
+    finally:
+        file.seek(0)
+    return int(match.group(1)) if match else None
+
+def sheet_filled_rows(file, limit=None):
+    """
+    數第一張工作表中有值的列 (含標題列；只有格式的儲存格不算)，不轉換任何儲存格。
+
+    只在解壓後的 XML 中找 </row> 與 <v>、<is>，一次讀 _SCAN_CHUNK_BYTES。
+    超過 limit 時立刻停止並回傳 limit + 1。不是 xlsx 時回傳 None。
+    """
+    count = 0
+    rest = b''
+    try:
+        file.seek(0)
+        with zipfile.ZipFile(file) as zf, zf.open(_first_sheet_name(zf)) as f:
+            while True:
+                chunk = f.read(_SCAN_CHUNK_BYTES)
+                if not chunk:
+                    break
+                # 最後一段可能是還沒讀完的列，留到下一次
+                *rows, rest = _ROW_END_RE.split(rest + chunk)
+                for row in rows:
+                    if _CELL_VALUE_RE.search(row):
+                        count += 1
+                        if limit is not None and count > limit:
+                            return count
+    except (zipfile.BadZipFile, KeyError, AttributeError, StopIteration, ElementTree.ParseError):
+        return None
+    finally:
+        file.seek(0)
+    return count
+
+def _find_header(rows):
+    """
+    在 rows 的前 HEADER_SEARCH_ROWS 列中找標題列，回傳 (已讀出的列, 標題列的位置)。
+
+    找不到時與 pd.read_excel 預設相同以第一列為標題；rows 要是 iterator，之後接著讀資料列。
+    """
+    head = []
+    header_idx = -1
+    with stage('header') as record:
+        for row in itertools.islice(rows, HEADER_SEARCH_ROWS):
+            head.append(row)
+            if is_header_row(row):
+                header_idx = len(head) - 1
+                break
+        record['header_row'] = header_idx
+    return head, max(header_idx, 0)
+
+def frame_from_rows(rows, columns, max_rows=None):
+    """
+    從原始列建立 DataFrame，只保留 columns 內的欄位 (依工作表中的順序)。
+
+    前 HEADER_SEARCH_ROWS 列用來偵測標題列，找不到時與 pd.read_excel 預設相同以第一列為標題。
+    之後每列只轉換需要的欄位，其餘欄位不會被轉成字串，也不會進入 DataFrame。
+    資料列超過 max_rows 時立刻丟出 UploadTooLarge，不會讀完整張表。
+    """
+    import pandas as pd
+    rows = iter(rows)
+    head, header_idx = _find_header(rows)
+    if not head:
+        return pd.DataFrame()
+
+    names = _column_names([_cell_to_str(val) for val in head[header_idx]])
+    positions = [i for i, name in enumerate(names) if str(name).strip() in columns]
+
+    with stage('rows') as record:
+        data = []
+        last_filled = 0
+        for row in itertools.chain(head[header_idx + 1:], rows):
+            width = len(row)
+            data.append([_cell_to_str(row[i]) if i < width else float('nan') for i in positions])
+            # 判斷空白列要看整列 (含沒選到的欄位)，才能和 pandas 一樣只去掉結尾的空白列
+            if not all(_is_blank(val) for val in row):
+                last_filled = len(data)
+                if max_rows is not None and last_filled > max_rows:
+                    raise UploadTooLarge(f"資料超過上限 {max_rows:,} 列")
+        del data[last_filled:]
+        record['rows'] = len(data)
+
+        return pd.DataFrame(data, columns=[names[i] for i in positions], dtype=object)
+
+def load_excel_with_auto_header(file, reader=READER_AUTO, optional_columns=(), max_rows=None):
+    """
+    自動偵測 Excel 的標題列位置。
+
+    整張工作表只讀一次，找到標題列後直接接著讀資料列；
+    只保留 REQUIRED_COLUMNS 與 optional_columns 指定的欄位。reader 請見 iter_raw_rows。
+    讀不出來時回傳 None；資料超過 max_rows 列時丟出 UploadTooLarge。
+    """
+    try:
+        with stage('open', reader=reader):
+            rows = iter_raw_rows(file, reader)
+        return frame_from_rows(rows, set(REQUIRED_COLUMNS).union(optional_columns), max_rows=max_rows)
+    except UploadTooLarge:
+        raise
+    except Exception:
+        return None
+
+def _iter_label_rows(rows, name_pos, address_pos, max_rows):
+    blank_rows = 0
+    filled = 0
+    for row in rows:
+        # 空白列要看整列，而且先只記數目：後面還有資料才輸出空白標籤，結尾的空白列與 pandas 一樣去掉
+        if all(_is_blank(val) for val in row):
+            blank_rows += 1
+            continue
+        filled += blank_rows + 1
+        if max_rows is not None and filled > max_rows:
+            raise UploadTooLarge(f"資料超過上限 {max_rows:,} 列")
+        if blank_rows:
+            yield from itertools.repeat(('', ''), blank_rows)
+            blank_rows = 0
+        width = len(row)
+        yield (
+            clean_label_text(_cell_to_str(row[name_pos])) if name_pos < width else '',
+            clean_label_text(_cell_to_str(row[address_pos])) if address_pos < width else '',
+        )
+
+def iter_excel_records(file, reader=READER_AUTO, max_rows=None):
+    """
+    直接從工作表逐筆產生清理過的 (姓名, 地址)，不建立 DataFrame。
+
+    結果與 iter_label_records(load_excel_with_auto_header(file, reader)) 相同，但一次只保留一列
+    (加上連續空白列的數目)，可以一路串流進 generate.write_word_doc 等寫檔函式，
+    幾十萬列的名單記憶體也只需要幾頁；但 reader 為 READER_AUTO 而有安裝 calamine 時，
+    calamine 開檔就會把整張表讀進記憶體，要限制記憶體請用 READER_OPENPYXL (見模組說明)。
+
+    開檔與找標題列在呼叫時就完成：讀不出來或缺少必要欄位時丟出 ValueError；
+    資料超過 max_rows 列時，讀到那一列才丟出 UploadTooLarge。
+    """
+    try:
+        with stage('open', reader=reader):
+            rows = iter(iter_raw_rows(file, reader))
+        head, header_idx = _find_header(rows)
+    except Exception as e:
+        raise ValueError("無法讀取 Excel 檔案，請確認格式") from e
+
+    header = [str(val).strip() for val in head[header_idx]] if head else []
+    missing = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing:
+        raise ValueError(f"缺少必要欄位：{'、'.join(missing)}")
+    name_pos, address_pos = (header.index(col) for col in REQUIRED_COLUMNS)
+    return _iter_label_rows(itertools.chain(head[header_idx + 1:], rows), name_pos, address_pos, max_rows)
@@ -0,0 +1,98 @@
+"""generate_word_doc / write_word_doc：依指定的引擎產生標籤 .docx。"""
+from .instrument import reporting_progress
+
+# --- 生成引擎 ---
+ENGINE_DOCX = 'python-docx'
+ENGINE_DOCX_CLONE = 'python-docx-clone'
+ENGINE_OOXML = 'ooxml'
+ENGINE_OOXML_PARALLEL = 'ooxml-parallel'
+ENGINES = {
+    ENGINE_DOCX: 'python-docx (標準)',
+    ENGINE_DOCX_CLONE: 'python-docx 整頁樣板複製',
+    ENGINE_OOXML: 'OOXML 直寫 (大量資料較快)',
+    ENGINE_OOXML_PARALLEL: 'OOXML 多行程 (數十萬筆)',
+}
+
+def generate_word_doc(df, engine=ENGINE_DOCX, workers=None, progress=None, table_per_page=False, layout=None):
+    """
+    生成 Word 文件的核心邏輯。
+
+    engine 可選 ENGINE_DOCX (python-docx 物件模型)、ENGINE_DOCX_CLONE (python-docx 整頁樣板複製)、
+    ENGINE_OOXML (直接寫 XML) 或 ENGINE_OOXML_PARALLEL (OOXML 分散到 workers 個子行程，預設為 CPU 核心數)，
+    產生的檔案完全相同。
+
+    layout 為標籤紙版面 (layout.LabelLayout，見 LAYOUT_PRESETS)，預設為 A4 2x8 滿版。
+
+    table_per_page 時每頁一個表格、頁與頁之間明確分頁，Word 不必一次排完整個大表格，
+    上千頁的檔案也能很快開啟；印出來的標籤位置與單一表格相同。
+
+    progress 為 callback(done, total, stage)，生成期間會收到節流過的進度 (見 instrument.reporting_progress)。
+
+    回傳已 seek(0) 的二進位檔案物件：python-docx 引擎為 BytesIO；
+    OOXML 引擎為 SpooledTemporaryFile，超過 SPOOL_MAX_BYTES 時內容會落在磁碟上。
+    用完請自行 close()。
+    """
+    # 引擎模組與版面會載入 python-docx，用到時才匯入
+    if layout is None:
+        from .layout import DEFAULT_LAYOUT
+        layout = DEFAULT_LAYOUT
+    with reporting_progress(progress):
+        if engine == ENGINE_DOCX:
+            from .docx_engine import generate_with_python_docx
+            return generate_with_python_docx(df, table_per_page=table_per_page, layout=layout)
+        if engine == ENGINE_DOCX_CLONE:
+            from .clone_engine import generate_with_python_docx_clone
+            return generate_with_python_docx_clone(df, table_per_page=table_per_page, layout=layout)
+        if engine == ENGINE_OOXML:
+            from .ooxml_engine import generate_with_ooxml
+            return generate_with_ooxml(df, table_per_page=table_per_page, layout=layout)
+        if engine == ENGINE_OOXML_PARALLEL:
+            from .parallel import generate_with_ooxml_parallel
+            return generate_with_ooxml_parallel(df, workers=workers, table_per_page=table_per_page, layout=layout)
+    raise ValueError(f"未知的生成引擎：{engine}")
+
+class _Counted:
+    """逐筆轉交 records 並記下已轉交的筆數"""
+
+    def __init__(self, records):
+        self.records = records
+        self.count = 0
+
+    def __iter__(self):
+        for self.count, record in enumerate(self.records, 1):
+            yield record
+
+def write_word_doc(records, fileobj, engine=ENGINE_OOXML, workers=None, table_per_page=False, layout=None,
+                   total=None):
+    """
+    把 (姓名, 地址) 的 iterable 寫成標籤 .docx 到 fileobj，回傳標籤數；不需要 DataFrame。
+
+    engine、workers、table_per_page、layout 與 generate_word_doc 相同。OOXML 引擎一邊讀 records 一邊寫，
+    記憶體與筆數無關，可以直接接 excel.iter_excel_records 的串流；python-docx 引擎要排完整份文件，
+    會先把 records 全部讀進 list。total 為預估筆數 (未知時為 None)，只用於進度。
+    """
+    if layout is None:
+        from .layout import DEFAULT_LAYOUT
+        layout = DEFAULT_LAYOUT
+    if engine in (ENGINE_DOCX, ENGINE_DOCX_CLONE):
+        from .docx_engine import write_with_python_docx
+        records = list(records)
+        if engine == ENGINE_DOCX:
+            from .docx_engine import build_label_document as build
+        else:
+            from .clone_engine import build_label_document_cloned as build
+        write_with_python_docx(records, fileobj, build=build, table_per_page=table_per_page, layout=layout)
+        return len(records)
+
+    counted = _Counted(records)
+    if engine == ENGINE_OOXML:
+        from .ooxml_engine import write_with_ooxml
+        write_with_ooxml(counted, fileobj, table_per_page=table_per_page, layout=layout, total=total)
+    elif engine == ENGINE_OOXML_PARALLEL:
+        from .parallel import write_with_ooxml_parallel
+        write_with_ooxml_parallel(
+            counted, fileobj, workers=workers, table_per_page=table_per_page, layout=layout, total=total,
+        )
+    else:
+        raise ValueError(f"未知的生成引擎：{engine}")
+    return counted.count
@@ -0,0 +1,220 @@
+"""
+可選的效能量測：記錄每個階段的耗時與記憶體。
+
+預設關閉，對效能沒有影響。用 ``with recording() as report:`` 包住要量測的程式，
+期間 labelgen 各階段 (open、header、rows、clean、build、save...) 都會記錄到 report，
+並以 JSON 格式寫到 logging 的 ``labelgen.instrument`` logger。
+
+進度回報另外用 ``with reporting_progress(callback):`` 開啟，給進度條用，不需要開量測。
+進行中的量測與進度回報都存在 ContextVar 中，Streamlit 每個 session (各自的執行緒) 互不干擾。
+
+記憶體為整個行程的 RSS：伺服器上同時有其他 session 時，數值也包含它們。
+"""
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# 每處理多少筆標籤記錄一次進度
+PROGRESS_EVERY = 1000
+# 進度回報：每多少筆才看一次時間，兩次回呼至少間隔幾秒
+PROGRESS_CHECK_EVERY = 100
+PROGRESS_MIN_INTERVAL = 0.25
+
+_current = ContextVar('labelgen_report', default=None)
+_progress = ContextVar('labelgen_progress', default=None)
+
+def current_rss_mb():
+    """目前行程的 RSS (MB)；無法取得時回傳 None"""
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss / 2 ** 20
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def process_peak_rss_mb():
+    """行程啟動以來的峰值 RSS (MB)；無法取得時回傳 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 的單位是 KB，macOS 是 bytes
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+class Report:
+    """
+    一次量測的結果。
+
+    stages 依結束順序列出各階段：stage、seconds、rss_mb (結束時)、peak_rss_mb (期間取樣的最大值)，
+    以及各階段自行加上的欄位 (例如 rows、labels)。progress 為每 PROGRESS_EVERY 筆的進度：
+    stage、done、total、elapsed (從開始量測起算的秒數)、rss_mb。
+    """
+
+    def __init__(self, **context):
+        self.context = context
+        self.stages = []
+        self.progress = []
+        self.seconds = None
+        self.peak_rss_mb = None
+        self._open = []
+        self._start = time.perf_counter()
+
+    def _emit(self, event, fields):
+        logger.info(json.dumps({'event': event, **self.context, **fields}, ensure_ascii=False, default=str))
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            for record in self._open:
+                if record['peak_rss_mb'] is None or rss > record['peak_rss_mb']:
+                    record['peak_rss_mb'] = rss
+        return rss
+
+    @contextmanager
+    def stage(self, name, **fields):
+        record = {'stage': name, **fields, 'seconds': None, 'rss_mb': None, 'peak_rss_mb': None}
+        start = time.perf_counter()
+        self._open.append(record)
+        self._sample()
+        try:
+            yield record
+        finally:
+            record['rss_mb'] = self._sample()
+            record['seconds'] = time.perf_counter() - start
+            self._open.remove(record)
+            self.stages.append(record)
+            self._emit('stage', record)
+
+    def tick(self, done, total=None):
+        entry = {
+            'stage': self._open[-1]['stage'] if self._open else None,
+            'done': done,
+            'total': total,
+            'elapsed': time.perf_counter() - self._start,
+            'rss_mb': self._sample(),
+        }
+        self.progress.append(entry)
+        self._emit('progress', entry)
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+        self.peak_rss_mb = process_peak_rss_mb()
+        self._emit('summary', {'seconds': self.seconds, 'process_peak_rss_mb': self.peak_rss_mb})
+
+class _Progress:
+    """把進度轉給 callback(done, total, stage)，依 PROGRESS_MIN_INTERVAL 節流"""
+
+    def __init__(self, callback, min_interval):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.stage = None
+        # 分冊等分段生成時，各段的進度換算成整體的進度
+        self.offset = 0
+        self.total = None
+        self._last = None
+
+    def enter(self, name, total=None):
+        self.stage = name
+        self.update(0, total, force=True)
+
+    def update(self, done, total=None, force=False):
+        now = time.perf_counter()
+        if not force and self._last is not None and now - self._last < self.min_interval:
+            return
+        self._last = now
+        self.callback(self.offset + done, self.total or total, self.stage)
+
+@contextmanager
+def reporting_progress(callback, min_interval=PROGRESS_MIN_INTERVAL):
+    """
+    在此區塊內把生成進度回報給 callback(done, total, stage)。
+
+    total 未知時為 None；stage 為目前的階段名稱 (clean、build、save、build_save...)。
+    callback 為 None 時沿用外層的設定。
+    """
+    if callback is None:
+        yield
+        return
+    token = _progress.set(_Progress(callback, min_interval))
+    try:
+        yield
+    finally:
+        _progress.reset(token)
+
+@contextmanager
+def progress_span(offset, total):
+    """區塊內的進度從 offset 起算，總數固定為 total；沒有在回報進度時不做任何事"""
+    progress = _progress.get()
+    if progress is None:
+        yield
+        return
+    saved = progress.offset, progress.total
+    progress.offset, progress.total = offset, total
+    try:
+        yield
+    finally:
+        progress.offset, progress.total = saved
+
+@contextmanager
+def recording(**context):
+    """在此區塊內開啟量測，產生 Report；context 的欄位會附加在每一筆 log 上"""
+    report = Report(**context)
+    token = _current.set(report)
+    try:
+        yield report
+    finally:
+        _current.reset(token)
+        report.finish()
+
+def stage(name, **fields):
+    """
+    量測一個階段：``with stage('build', labels=n) as record: ...``。
+
+    沒有在量測時不做任何事；record 仍是 dict，可以放心寫入欄位。
+    """
+    progress = _progress.get()
+    if progress is not None:
+        progress.enter(name, fields.get('labels'))
+    report = _current.get()
+    if report is None:
+        return nullcontext({})
+    return report.stage(name, **fields)
+
+def track(records, total=None):
+    """
+    逐筆轉交 records，量測中時每 PROGRESS_EVERY 筆記錄一次進度，
+    回報進度時每 PROGRESS_CHECK_EVERY 筆看一次是否該呼叫 callback。
+
+    兩者都沒開時原樣回傳 records，迴圈不會多任何負擔。
+    """
+    report = _current.get()
+    progress = _progress.get()
+    if report is None and progress is None:
+        return records
+    return _track(report, progress, records, total)
+
+def _track(report, progress, records, total):
+    done = 0
+    for done, record in enumerate(records, 1):
+        yield record
+        if report is not None and done % PROGRESS_EVERY == 0:
+            report.tick(done, total)
+        if progress is not None and done % PROGRESS_CHECK_EVERY == 0:
+            progress.update(done, total)
+    if report is not None and done % PROGRESS_EVERY:
+        report.tick(done, total)
+    if progress is not None:
+        progress.update(done, total, force=True)
@@ -0,0 +1,172 @@
+"""
+背景生成工作：丟進執行緒池排隊執行，呼叫端不必等待。
+
+每個工作有隨機的工作 ID，頁面重跑或重新整理後仍可用 ID 查詢進度、取回結果。
+同時執行的工作數由 max_workers 限制 (預設讀環境變數 LABELGEN_JOB_WORKERS)，
+其餘的依送出順序排隊，大量使用者同時生成也不會把主機拖垮。
+ooxml-parallel 引擎每個工作會另開子行程，每個工作的子行程數為 process_workers
+(預設讀 LABELGEN_PROCESS_WORKERS，未設定時把 CPU 核心平分給同時執行的工作)。
+結束的工作保留 JOB_RESULT_TTL 秒，結果的總位元組數另有上限 (LABELGEN_JOB_RESULT_MAX_BYTES)，
+超過時先丟掉最舊的。
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import os
+import threading
+import time
+import uuid
+
+from .admission import int_from_env
+from .instrument import recording, reporting_progress
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# 同時執行的工作數
+JOB_WORKERS_ENV = 'LABELGEN_JOB_WORKERS'
+JOB_WORKERS_DEFAULT = 2
+# 每個工作 (ooxml-parallel 引擎) 的子行程數
+PROCESS_WORKERS_ENV = 'LABELGEN_PROCESS_WORKERS'
+# 結束的工作保留多久 (秒)，過期後結果就取不回來了
+JOB_RESULT_TTL = 60 * 60
+# 結束的工作保留的結果總位元組數上限
+JOB_RESULT_MAX_BYTES_ENV = 'LABELGEN_JOB_RESULT_MAX_BYTES'
+JOB_RESULT_MAX_BYTES_DEFAULT = 128 * 1024 * 1024
+
+def job_workers_from_env():
+    """環境變數 LABELGEN_JOB_WORKERS 指定的同時執行數，未設定時為 JOB_WORKERS_DEFAULT"""
+    return int_from_env(JOB_WORKERS_ENV, JOB_WORKERS_DEFAULT)
+
+def process_workers_from_env(job_workers):
+    """
+    每個工作可用的子行程數：環境變數 LABELGEN_PROCESS_WORKERS，
+    未設定時為 CPU 核心數除以同時執行的工作數，同時跑滿也不會超過核心數
+    """
+    return int_from_env(PROCESS_WORKERS_ENV, max(1, (os.cpu_count() or 1) // job_workers))
+
+class Job:
+    """
+    一個生成工作。欄位由背景執行緒更新，其他執行緒只讀取。
+
+    progress 為最近一次的 (done, total, stage)；result 為 fn 的回傳值，失敗時 error 為例外；
+    info 為送出時附帶的資料 (例如檔名)，report 為開啟量測時的 instrument.Report。
+    """
+
+    def __init__(self, job_id, key=None, info=None):
+        self.id = job_id
+        self.key = key
+        self.info = info or {}
+        self.status = JOB_QUEUED
+        self.progress = (0, None, None)
+        self.result = None
+        self.error = None
+        self.report = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def is_finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    @property
+    def result_bytes(self):
+        """結果佔用的位元組數 (結果不是 bytes 時為 0)"""
+        return len(self.result) if isinstance(self.result, (bytes, bytearray)) else 0
+
+    def _update_progress(self, done, total, stage):
+        # 總數未知的階段保留上一次的數字，只換階段名稱
+        if total is None:
+            done, total, _ = self.progress
+        self.progress = (done, total, stage)
+
+class JobQueue:
+    """
+    執行緒池上的工作佇列；所有 session 共用一個，用 lock 保護工作表。
+
+    process_workers 為每個工作可以開的子行程數，送出 ooxml-parallel 工作時請當作 workers 傳入。
+    結束的工作超過 result_ttl 秒，或結果總計超過 result_max_bytes 時由舊到新移除；
+    最新結束的一個一定保留，不然單一結果就超過上限時使用者永遠拿不到。
+    """
+
+    def __init__(self, max_workers=None, result_ttl=JOB_RESULT_TTL, process_workers=None, result_max_bytes=None):
+        self.max_workers = max_workers or job_workers_from_env()
+        self.process_workers = process_workers or process_workers_from_env(self.max_workers)
+        self.result_ttl = result_ttl
+        self.result_max_bytes = result_max_bytes or int_from_env(JOB_RESULT_MAX_BYTES_ENV, JOB_RESULT_MAX_BYTES_DEFAULT)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='labelgen-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, key=None, info=None, profile=False):
+        """
+        排入 fn()，回傳工作 ID。fn 回傳的值就是工作結果；
+        執行期間 labelgen 的生成進度會自動記到 Job.progress (見 instrument.reporting_progress)。
+
+        key 相同且尚未結束的工作已在佇列中時不重複排入，直接回傳那個工作的 ID，
+        使用者連按兩次也只會生成一次。profile=True 時在 recording() 中執行。
+        """
+        with self._lock:
+            self._prune()
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and not job.is_finished:
+                        return job.id
+            job = Job(uuid.uuid4().hex, key=key, info=info)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, profile)
+        return job.id
+
+    def get(self, job_id):
+        """查詢工作；不存在或已過期時回傳 None"""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def position(self, job_id):
+        """排隊中的工作前面還有幾個在排 + 1 (1 表示下一個執行)；不在排隊時回傳 0"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JOB_QUEUED:
+                return 0
+            # 工作表依送出順序排列，執行緒池也是先進先出
+            ahead = 0
+            for other in self._jobs.values():
+                if other is job:
+                    return ahead + 1
+                if other.status == JOB_QUEUED:
+                    ahead += 1
+
+    def _run(self, job, fn, profile):
+        job.started = time.time()
+        job.status = JOB_RUNNING
+        try:
+            with (recording(job=job.id) if profile else nullcontext()) as report, \
+                    reporting_progress(job._update_progress):
+                job.report = report
+                result = fn()
+        except Exception as e:
+            job.error = e
+            status = JOB_FAILED
+        else:
+            job.result = result
+            status = JOB_DONE
+        # 先記下結束時間再改狀態，_prune 看到已結束的工作時 finished 一定有值
+        job.finished = time.time()
+        job.status = status
+        with self._lock:
+            self._prune()
+
+    def _prune(self):
+        deadline = time.time() - self.result_ttl
+        finished = sorted((job for job in self._jobs.values() if job.is_finished), key=lambda job: job.finished)
+        total_bytes = sum(job.result_bytes for job in finished)
+        for job in finished[:-1]:
+            if job.finished >= deadline and total_bytes <= self.result_max_bytes:
+                break
+            total_bytes -= job.result_bytes
+            del self._jobs[job.id]
+        if finished and finished[-1].finished < deadline:
+            del self._jobs[finished[-1].id]
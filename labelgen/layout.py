@@ -0,0 +1,144 @@
+"""
+標籤版面參數。
+
+預設為 A4 滿版 (2欄 x 8列)，無框線；其他標籤紙與信封見 LAYOUT_PRESETS，
+也可以自行建立 LabelLayout。各引擎依版面預先組好的樣板與母版都以 LabelLayout 為鍵快取，
+換版面不會拖慢排版迴圈。
+"""
+from docx.shared import Cm, Emu, Mm, Pt
+
+# --- 版面參數：A4 滿版 (2欄 x 8列) ---
+PAGE_WIDTH = Cm(21.0)
+PAGE_HEIGHT = Cm(29.7)
+LABEL_COLS = 2
+LABEL_WIDTH = Cm(10.5)
+LABEL_HEIGHT = Cm(3.7)  # 3.7cm * 8 = 29.6cm
+LABEL_ROWS = 8  # 每頁列數，由頁高與標籤高度決定，僅供分頁計算
+LABELS_PER_PAGE = LABEL_COLS * LABEL_ROWS
+# 每頁一個表格時，頁與頁之間分頁段落的固定行高 (必須小於頁高 - 8 列標籤高 = 0.1cm)
+PAGE_BREAK_LINE_HEIGHT = Pt(1)
+NAME_INDENT = Cm(0.5)
+NAME_SPACE_BEFORE = Pt(5)
+NAME_SPACE_AFTER = Pt(2)  # 稍微留一點空間給地址
+ADDRESS_INDENT = Cm(1.3)  # 保持縮排，比較美觀
+NAME_FONT_SIZE = 14
+ADDRESS_FONT_SIZE = 12
+LATIN_FONT = 'Times New Roman'
+EAST_ASIA_FONT = '標楷體'
+# 姓名、地址段落樣式的名稱 (寫在 styles.xml，styleId 為去掉空白的名稱)
+NAME_STYLE = 'Label Name'
+ADDRESS_STYLE = 'Label Address'
+
+# 每個行程最多保留幾種版面的樣板與母版
+LAYOUT_CACHE_SIZE = 16
+
+class LabelLayout:
+    """
+    一種標籤紙 (或信封) 的版面：頁面大小、欄列數、格子大小、上左邊界，以及姓名與地址的縮排、段距、字級。
+
+    標籤之間有間距的標籤紙，以標籤的間距 (pitch，標籤寬高 + 間距) 當格子大小，
+    上邊界再減去一半的上下間距，文字垂直置中後仍落在標籤正中。
+    長度為 python-docx 的 Length (Cm、Mm、Pt...)，字級為 pt。建立後不要修改，會當作快取鍵。
+    """
+
+    def __init__(self, title, page_width, page_height, cols, rows, label_width, label_height,
+                 margin_top=Cm(0), margin_left=Cm(0), name_indent=NAME_INDENT, address_indent=ADDRESS_INDENT,
+                 name_space_before=NAME_SPACE_BEFORE, name_space_after=NAME_SPACE_AFTER,
+                 name_font_size=NAME_FONT_SIZE, address_font_size=ADDRESS_FONT_SIZE,
+                 latin_font=LATIN_FONT, east_asia_font=EAST_ASIA_FONT):
+        if cols < 1 or rows < 1:
+            raise ValueError(f"欄數與列數必須大於 0：{cols} x {rows}")
+        if margin_left + cols * label_width > page_width or margin_top + rows * label_height > page_height:
+            raise ValueError(f"{title}：{cols} x {rows} 張標籤超出頁面範圍")
+        self.title = title
+        # 長度一律存成 Emu：Cm、Pt 等子類別 pickle 後會以 EMU 數值再換算一次，傳給子行程時會放大
+        self.page_width = Emu(page_width)
+        self.page_height = Emu(page_height)
+        self.cols = cols
+        self.rows = rows
+        self.label_width = Emu(label_width)
+        self.label_height = Emu(label_height)
+        self.margin_top = Emu(margin_top)
+        self.margin_left = Emu(margin_left)
+        self.name_indent = Emu(name_indent)
+        self.address_indent = Emu(address_indent)
+        self.name_space_before = Emu(name_space_before)
+        self.name_space_after = Emu(name_space_after)
+        self.name_font_size = name_font_size
+        self.address_font_size = address_font_size
+        self.latin_font = latin_font
+        self.east_asia_font = east_asia_font
+
+    @property
+    def labels_per_page(self):
+        return self.cols * self.rows
+
+    @property
+    def page_break_fits(self):
+        """最後一列下方放得下分頁段落 (PAGE_BREAK_LINE_HEIGHT)，才能每頁一個表格"""
+        return self.page_height - self.margin_top - self.rows * self.label_height >= PAGE_BREAK_LINE_HEIGHT
+
+    def signature(self):
+        """所有會影響輸出的參數 (不含名稱)，做為快取鍵的一部分"""
+        return (
+            int(self.page_width), int(self.page_height), self.cols, self.rows,
+            int(self.label_width), int(self.label_height), int(self.margin_top), int(self.margin_left),
+            int(self.name_indent), int(self.name_space_before), int(self.name_space_after),
+            int(self.address_indent), self.name_font_size, self.address_font_size,
+            self.latin_font, self.east_asia_font, NAME_STYLE, ADDRESS_STYLE,
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, LabelLayout) and self.signature() == other.signature()
+
+    def __hash__(self):
+        return hash(self.signature())
+
+    def __repr__(self):
+        return f"LabelLayout({self.title!r})"
+
+# --- 版面預設 ---
+LAYOUT_DEFAULT = 'a4-2x8'
+LAYOUT_PRESETS = {
+    LAYOUT_DEFAULT: LabelLayout(
+        'A4 2x8 滿版 (10.5 x 3.7cm)', PAGE_WIDTH, PAGE_HEIGHT, LABEL_COLS, LABEL_ROWS, LABEL_WIDTH, LABEL_HEIGHT,
+    ),
+    'a4-2x6': LabelLayout(
+        'A4 2x6 滿版 (10.5 x 4.9cm)', PAGE_WIDTH, PAGE_HEIGHT, 2, 6, Cm(10.5), Cm(4.9),
+        margin_top=Mm(1.5), name_space_before=Pt(8), name_space_after=Pt(4),
+        name_font_size=16, address_font_size=14,
+    ),
+    'a4-3x8': LabelLayout(
+        'A4 3x8 滿版 (7.0 x 3.7cm，Avery 3474)', PAGE_WIDTH, PAGE_HEIGHT, 3, 8, Cm(7.0), Cm(3.7),
+        margin_top=Mm(0.5), name_indent=Cm(0.3), address_indent=Cm(0.6),
+        name_font_size=12, address_font_size=10,
+    ),
+    # Avery L7163 / L7160：左右間距 2.5mm，上下無間距
+    'avery-l7163': LabelLayout(
+        'Avery L7163 (2x7，9.91 x 3.81cm)', PAGE_WIDTH, PAGE_HEIGHT, 2, 7, Mm(101.6), Mm(38.1),
+        margin_top=Mm(15.15), margin_left=Mm(4.65),
+    ),
+    'avery-l7160': LabelLayout(
+        'Avery L7160 (3x7，6.35 x 3.81cm)', PAGE_WIDTH, PAGE_HEIGHT, 3, 7, Mm(66.0), Mm(38.1),
+        margin_top=Mm(15.15), margin_left=Mm(7.25), name_indent=Cm(0.3), address_indent=Cm(0.6),
+        name_font_size=12, address_font_size=10,
+    ),
+    # 信封：每頁一個，收件人放在右下方 (以縮排推到右半邊)；格子比頁高少 1mm，留給分頁段落
+    'envelope-dl': LabelLayout(
+        'DL 信封 (22 x 11cm)', Cm(22), Cm(11), 1, 1, Cm(22), Cm(10.9),
+        name_indent=Cm(9), address_indent=Cm(9.5), name_font_size=16, address_font_size=14,
+    ),
+    'envelope-c6': LabelLayout(
+        'C6 信封 (16.2 x 11.4cm)', Cm(16.2), Cm(11.4), 1, 1, Cm(16.2), Cm(11.3),
+        name_indent=Cm(6), address_indent=Cm(6.5), name_font_size=16, address_font_size=14,
+    ),
+    'envelope-c5': LabelLayout(
+        'C5 信封 (22.9 x 16.2cm)', Cm(22.9), Cm(16.2), 1, 1, Cm(22.9), Cm(16.1),
+        name_indent=Cm(10), address_indent=Cm(10.5), name_font_size=18, address_font_size=16,
+    ),
+}
+DEFAULT_LAYOUT = LAYOUT_PRESETS[LAYOUT_DEFAULT]
+
+def layout_signature(layout=DEFAULT_LAYOUT):
+    """所有會影響輸出的版面參數，做為快取鍵的一部分"""
+    return layout.signature()
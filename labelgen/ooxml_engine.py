@@ -0,0 +1,335 @@
+"""
+OOXML 直寫引擎。
+
+不建立 python-docx 的 Paragraph/Run 物件，直接用預先組好的字串樣板拼出 word/document.xml。
+其餘零件 (styles.xml、settings.xml...) 沿用 new_label_document() 存檔後的內容，
+所以輸出與 python-docx 引擎逐位元組相同。這些零件與表格樣板每種版面 (LabelLayout) 每個行程
+只建立、壓縮一次，之後每份檔案直接複製。
+"""
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+import itertools
+import re
+import tempfile
+import zipfile
+import zlib
+
+from docx.opc.oxml import serialize_part_xml
+from docx.shared import Emu
+
+from .docx_engine import (
+    ADDRESS_STYLE_ID, NAME_STYLE_ID, _base_label_document, add_page_break, check_table_per_page,
+    new_label_document,
+)
+from .instrument import stage, track
+from .layout import DEFAULT_LAYOUT, LAYOUT_CACHE_SIZE
+from .records import iter_label_records
+
+# 輸出的暫存檔超過此大小後會從記憶體轉存到磁碟
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+# 串流寫入 document.xml 時，每累積多少列才寫出一次
+STREAM_ROWS_PER_CHUNK = 200
+
+# XML 1.0 不允許的控制字元 (python-docx 遇到時同樣會拋出 ValueError)
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+class _PassThrough:
+    """假的壓縮器：資料已經壓縮過，原樣輸出"""
+
+    def compress(self, data):
+        return data
+
+    def flush(self):
+        return b''
+
+def _new_deflater():
+    # 與 zipfile 的 ZIP_DEFLATED 相同：raw deflate、預設壓縮等級
+    return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+
+def _deflate_segment(data):
+    """回傳 (壓縮後的片段, CRC-32, 原始長度)"""
+    deflater = _new_deflater()
+    return deflater.compress(data) + deflater.flush(zlib.Z_SYNC_FLUSH), zlib.crc32(data), len(data)
+
+def _crc32_combine(crc1, crc2, len2):
+    """由 crc32(A)、crc32(B) 與 len(B) 算出 crc32(A + B)"""
+    # CRC-32 對初始值是仿射的：crc32(B, c) = crc32(零 * n, c) ^ crc32(零 * n) ^ crc32(B)
+    zeros = bytes(len2)
+    return zlib.crc32(zeros, crc1) ^ zlib.crc32(zeros) ^ crc2
+
+# 直接寫入預先壓縮資料時要改動的 zipfile 內部欄位 (_ZipWriteFile)
+_ZIP_WRITE_FIELDS = ('_compressor', '_crc', '_file_size')
+
+def _write_inflated_member(zf, name, segments):
+    """_write_deflated_member 的備援：把片段解壓回原始資料，交給 zipfile 照一般方式壓縮"""
+    inflater = zlib.decompressobj(-15)
+    with zf.open(name, 'w') as stream:
+        for data, _, _ in segments:
+            stream.write(inflater.decompress(data))
+
+def _write_passthrough_member(zf, name, segments):
+    """把壓縮好的片段原樣寫進 zip：換掉 zipfile 的壓縮器，關閉前填回 CRC 與大小"""
+    crc = 0
+    size = 0
+    with zf.open(name, 'w') as stream:
+        if not all(hasattr(stream, field) for field in _ZIP_WRITE_FIELDS):
+            raise AttributeError(f"zipfile 的寫入串流缺少 {_ZIP_WRITE_FIELDS}")
+        stream._compressor = _PassThrough()
+        for data, segment_crc, segment_size in segments:
+            stream.write(data)
+            # 第一段不必合併 (預先壓縮好的零件只有一段，省下對整段零位元組算 CRC)
+            crc = _crc32_combine(crc, segment_crc, segment_size) if size else segment_crc
+            size += segment_size
+        stream.write(_new_deflater().flush())  # 最後一個 (空的) 結束區塊
+        stream._crc = crc
+        stream._file_size = size
+
+@lru_cache(maxsize=None)
+def _passthrough_supported():
+    """
+    這個 Python 的 zipfile 是否能用 _write_deflated_member 的方式寫入預先壓縮的資料。
+
+    每個行程只檢查一次：實際寫一個小檔並用 testzip() 驗證 CRC 與內容，
+    zipfile 內部實作改變時自動改用 _write_inflated_member，不會默默產生壞檔。
+    """
+    buffer = BytesIO()
+    try:
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+            _write_passthrough_member(zf, 'a', [_deflate_segment(b'label' * 10), _deflate_segment(b'gen')])
+        with zipfile.ZipFile(buffer) as zf:
+            return zf.testzip() is None and zf.read('a') == b'label' * 10 + b'gen'
+    except (AttributeError, zipfile.BadZipFile, zlib.error):
+        return False
+
+def _write_deflated_member(zf, name, segments):
+    """
+    把 _deflate_segment 產生的片段依序寫成 zip 中的一個 ZIP_DEFLATED 檔案。
+
+    zipfile 沒有寫入預先壓縮資料的公開介面：這裡沿用 ZipFile.open(name, 'w') 產生檔頭與目錄，
+    只把壓縮器換成原樣輸出，並在關閉前填回原始資料的 CRC 與大小。
+    這個 Python 不支援時 (見 _passthrough_supported) 改為解壓後重新壓縮，內容相同。
+    """
+    if _passthrough_supported():
+        _write_passthrough_member(zf, name, segments)
+    else:
+        _write_inflated_member(zf, name, segments)
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _ooxml_base_package(layout=DEFAULT_LAYOUT):
+    """
+    回傳 (零件清單, document.xml 表格前的部分, document.xml 表格後的部分)。
+
+    零件清單為 (檔名, _deflate_segment 壓縮好的內容) 並保留原本順序，word/document.xml 以 None 佔位。
+    每種版面每個行程只建立一次。
+    """
+    buffer = BytesIO()
+    new_label_document(layout).save(buffer)
+    with zipfile.ZipFile(buffer) as zf:
+        parts = [(info.filename, zf.read(info)) for info in zf.infolist()]
+
+    document_xml = dict(parts)['word/document.xml'].decode('utf-8')
+    body_start = document_xml.index('<w:body>') + len('<w:body>')
+    sect_start = document_xml.index('<w:sectPr', body_start)
+
+    parts = tuple(
+        (name, None if name == 'word/document.xml' else _deflate_segment(data))
+        for name, data in parts
+    )
+    return parts, document_xml[:body_start], document_xml[sect_start:]
+
+def _page_break_xml(layout):
+    """docx_engine.add_page_break 產生的分頁段落 XML (內含 layout 的頁面設定)"""
+    doc = new_label_document(layout)
+    add_page_break(doc)
+    buffer = BytesIO()
+    doc.save(buffer)
+    with zipfile.ZipFile(buffer) as zf:
+        document_xml = zf.read('word/document.xml').decode('utf-8')
+    # 分頁段落是 body 中唯一的內容，之後是文件最後的 sectPr
+    return document_xml[document_xml.index('<w:body>') + len('<w:body>'):document_xml.rindex('<w:sectPr')]
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _ooxml_templates(layout=DEFAULT_LAYOUT):
+    """
+    預先組好的表格 XML 片段，內容對應 docx_engine 的表格與 fill_label_cell 設定。
+
+    字型、段距等格式都在 styles.xml 的樣式中 (沿用 new_label_document 的零件)，段落只引用樣式。
+    每種版面只組一次，排版迴圈只做字串代換。
+    """
+    # python-docx 的 add_table 以「頁寬 - 左右邊界」平均分配欄寬，邊界為 0 時會退回 1 英吋；
+    # 沒有資料的最後一格保留這個預設寬度
+    empty_cell_width = Emu(new_label_document(layout)._block_width // layout.cols).twips
+    label_width = layout.label_width.twips
+
+    return {
+        'table_start': (
+            '<w:tbl><w:tblPr><w:tblW w:type="auto" w:w="0"/><w:tblLayout w:type="fixed"/>'
+            '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0"'
+            ' w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+            '<w:tblGrid>'
+            + f'<w:gridCol w:w="{label_width}"/>' * layout.cols
+            + '</w:tblGrid>'
+        ),
+        'table_end': '</w:tbl>',
+        'row_start': (
+            f'<w:tr><w:trPr><w:trHeight w:hRule="exact" w:val="{layout.label_height.twips}"/></w:trPr>'
+        ),
+        'row_end': '</w:tr>',
+        'cell': (
+            f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{label_width}"/><w:vAlign w:val="center"/></w:tcPr>'
+            f'<w:p><w:pPr><w:pStyle w:val="{NAME_STYLE_ID}"/></w:pPr>{{name_run}}</w:p>'
+            f'<w:p><w:pPr><w:pStyle w:val="{ADDRESS_STYLE_ID}"/></w:pPr>{{address_run}}</w:p>'
+            '</w:tc>'
+        ),
+        'run': '<w:r>{text}</w:r>',
+        'empty_cell': f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{empty_cell_width}"/></w:tcPr><w:p/></w:tc>',
+        'page_break': _page_break_xml(layout),
+    }
+
+def _run_text_xml(text):
+    """比照 python-docx 的 run.text：Tab 轉 <w:tab/>、換行轉 <w:br/>，其餘文字跳脫後放進 <w:t>"""
+    if _INVALID_XML_CHARS.search(text):
+        raise ValueError(f"文字含有 XML 不允許的控制字元：{text!r}")
+
+    pieces = []
+    for chunk in re.split(r'([\t\r\n])', text):
+        if chunk == '\t':
+            pieces.append('<w:tab/>')
+        elif chunk in ('\r', '\n'):
+            pieces.append('<w:br/>')
+        elif chunk:
+            space = ' xml:space="preserve"' if chunk.strip() != chunk else ''
+            pieces.append(f'<w:t{space}>{escape(chunk)}</w:t>')
+    return ''.join(pieces)
+
+def _iter_ooxml_table(records, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """依序產生表格 XML，每次一整列 (layout.cols 格)；table_per_page 時每頁一個表格"""
+    if table_per_page:
+        yield from _iter_ooxml_page_tables(records, layout=layout)
+        return
+    t = _ooxml_templates(layout)
+    yield t['table_start']
+    yield from _iter_ooxml_rows(records, layout)
+    yield t['table_end']
+
+def _iter_ooxml_page_tables(records, first=True, layout=DEFAULT_LAYOUT):
+    """
+    每 layout.labels_per_page 筆一個表格，表格之間放分頁段落 (見 docx_engine.add_page_break)。
+
+    first 為 False 表示前面已經有表格，第一個表格之前也要分頁；
+    records 以整頁切開、分段產生時，依序接起來與一次產生完全相同。
+    """
+    t = _ooxml_templates(layout)
+    labels_per_page = layout.labels_per_page
+    records = iter(records)
+    while True:
+        page = list(itertools.islice(records, labels_per_page))
+        if not page and not first:
+            break
+        if not first:
+            yield t['page_break']
+        yield t['table_start']
+        yield from _iter_ooxml_rows(page, layout)
+        yield t['table_end']
+        if len(page) < labels_per_page:
+            break
+        first = False
+
+def _iter_ooxml_rows(records, layout=DEFAULT_LAYOUT):
+    """
+    只產生表格列的 XML，最後不足一列時以空白格補齊。
+
+    records 的筆數為 layout.cols 的倍數時，分段產生再依序接起來與一次產生完全相同。
+    """
+    t = _ooxml_templates(layout)
+    cols = layout.cols
+    cells = []
+    for name, raw_address in records:
+        # 比照 python-docx：沒有姓名或地址時段落內不放 run
+        name_run = t['run'].format(text=_run_text_xml(f"{name} 君收")) if name else ''
+        address_run = t['run'].format(text=_run_text_xml(raw_address)) if raw_address else ''
+        cells.append(t['cell'].format(name_run=name_run, address_run=address_run))
+        if len(cells) == cols:
+            yield t['row_start'] + ''.join(cells) + t['row_end']
+            cells = []
+
+    if cells:
+        cells.extend([t['empty_cell']] * (cols - len(cells)))
+        yield t['row_start'] + ''.join(cells) + t['row_end']
+
+def write_ooxml_docx(records, fileobj, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """
+    將 (姓名, 地址) 依 layout 逐列寫成 .docx 到 fileobj；table_per_page 時每頁一個表格。
+
+    document.xml 以串流方式寫進 zip，一次只保留 STREAM_ROWS_PER_CHUNK 列的 XML，
+    不會在記憶體中組出整份文件。
+    """
+    if table_per_page:
+        check_table_per_page(layout)
+    parts, document_head, document_tail = _ooxml_base_package(layout)
+
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, segment in parts:
+            if segment is not None:
+                _write_deflated_member(zf, name, [segment])
+                continue
+
+            with zf.open(name, 'w') as stream:
+                stream.write(document_head.encode('utf-8'))
+                pending = []
+                for xml in _iter_ooxml_table(records, table_per_page, layout):
+                    pending.append(xml)
+                    if len(pending) >= STREAM_ROWS_PER_CHUNK:
+                        stream.write(''.join(pending).encode('utf-8'))
+                        pending.clear()
+                pending.append(document_tail)
+                stream.write(''.join(pending).encode('utf-8'))
+
+def _related_parts(doc):
+    return {rel.target_part for rel in doc.part.rels.values() if not rel.is_external}
+
+def save_label_document(doc, fileobj, layout=DEFAULT_LAYOUT):
+    """
+    把標籤文件存成 .docx，結果與 doc.save(fileobj) 相同。
+
+    文件與 layout 母版共用其他零件時 (引擎內部以 _new_shared_document 建立的文件)，
+    只有 document.xml 需要序列化與壓縮，其餘零件直接複製 _ooxml_base_package 壓縮好的內容；
+    其他文件 (例如 new_label_document 建立、可能改過樣式或多了圖片) 改用 doc.save。
+    """
+    base = _base_label_document(layout)
+    if _related_parts(doc) != _related_parts(base):
+        doc.save(fileobj)
+        return
+
+    parts, _, _ = _ooxml_base_package(layout)
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, segment in parts:
+            if segment is not None:
+                _write_deflated_member(zf, name, [segment])
+            else:
+                zf.writestr(name, serialize_part_xml(doc.element))
+
+def write_with_ooxml(records, fileobj, table_per_page=False, layout=DEFAULT_LAYOUT, total=None):
+    """
+    write_ooxml_docx 加上量測與進度回報；total 為 records 的筆數 (未知時為 None)，只用於進度。
+    records 可以是任何 iterable，一邊讀一邊寫。
+    """
+    records = track(records, total=total)
+    # 排版與存檔是同一個串流步驟
+    with stage('build_save', labels=total) as record:
+        write_ooxml_docx(records, fileobj, table_per_page=table_per_page, layout=layout)
+        record['bytes'] = fileobj.tell()
+
+def generate_with_ooxml(df, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """以字串樣板直接串流寫出 document.xml 並打包成 .docx"""
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        write_with_ooxml(
+            iter_label_records(df), output, table_per_page=table_per_page, layout=layout, total=len(df),
+        )
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output
@@ -0,0 +1,133 @@
+"""
+多行程平行生成，給數十萬筆的大量寄件用。
+
+名單切成整頁對齊的區塊 (每頁標籤數的倍數)，每個區塊在子行程中排成表格列 XML，
+並直接壓縮成一段 raw deflate (以 Z_SYNC_FLUSH 結尾，可以直接串接)。主行程只負責依原順序
+把各段寫進 zip，所以排版與壓縮都分散到各核心。document.xml 內容與單行程完全相同。
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import multiprocessing
+import os
+import tempfile
+import zipfile
+
+from .instrument import stage, track
+from .docx_engine import check_table_per_page
+from .layout import DEFAULT_LAYOUT
+from .ooxml_engine import (
+    SPOOL_MAX_BYTES, _deflate_segment, _iter_ooxml_page_tables, _iter_ooxml_rows, _ooxml_base_package,
+    _ooxml_templates, _write_deflated_member, write_ooxml_docx,
+)
+from .records import iter_label_records
+
+# 每個區塊的頁數
+PARALLEL_CHUNK_PAGES = 64
+# 每個子行程最多預先排入幾個區塊，限制主行程同時保留的結果
+PARALLEL_CHUNKS_PER_WORKER = 2
+
+def _render_chunk(chunk):
+    """
+    子行程：把一個區塊排成 XML 並壓縮。chunk 為 (records, table_per_page, 是否為第一個區塊, layout)。
+
+    單一表格時只產生表格列；每頁一個表格時連同表格頭尾與分頁段落一起產生。
+    """
+    records, table_per_page, first, layout = chunk
+    if table_per_page:
+        xml = ''.join(_iter_ooxml_page_tables(records, first=first, layout=layout))
+    else:
+        xml = ''.join(_iter_ooxml_rows(records, layout))
+    return _deflate_segment(xml.encode('utf-8'))
+
+def _iter_chunks(records, size):
+    records = iter(records)
+    while chunk := list(itertools.islice(records, size)):
+        yield chunk
+
+def _map_in_order(executor, fn, items, window):
+    """與 executor.map 相同依序回傳結果，但最多只排入 window 個工作，不會一次讀完 items"""
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+def _pool_context():
+    # Streamlit 伺服器本身有多個執行緒，fork 並不安全；Windows 則只有 spawn
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+def write_ooxml_docx_parallel(records, fileobj, workers=None, chunk_pages=PARALLEL_CHUNK_PAGES,
+                              table_per_page=False, layout=DEFAULT_LAYOUT):
+    """
+    與 write_ooxml_docx 相同，但排版與壓縮分散到 workers 個子行程 (預設為 CPU 核心數)。
+
+    只有一個區塊或 workers 為 1 時，直接在本行程以 write_ooxml_docx 處理。
+    """
+    if table_per_page:
+        check_table_per_page(layout)
+    workers = workers or os.cpu_count() or 1
+    chunks = _iter_chunks(records, chunk_pages * layout.labels_per_page)
+    first = list(itertools.islice(chunks, 2))
+    if workers == 1 or len(first) < 2:
+        write_ooxml_docx(
+            itertools.chain.from_iterable(itertools.chain(first, chunks)), fileobj,
+            table_per_page=table_per_page, layout=layout,
+        )
+        return
+
+    parts, document_head, document_tail = _ooxml_base_package(layout)
+    if not table_per_page:
+        t = _ooxml_templates(layout)
+        document_head += t['table_start']
+        document_tail = t['table_end'] + document_tail
+    with ProcessPoolExecutor(workers, mp_context=_pool_context()) as executor, \
+            zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, segment in parts:
+            if segment is not None:
+                _write_deflated_member(zf, name, [segment])
+                continue
+
+            rows = _map_in_order(
+                executor, _render_chunk,
+                (
+                    (records, table_per_page, i == 0, layout)
+                    for i, records in enumerate(itertools.chain(first, chunks))
+                ),
+                window=workers * PARALLEL_CHUNKS_PER_WORKER,
+            )
+            _write_deflated_member(zf, name, itertools.chain(
+                [_deflate_segment(document_head.encode('utf-8'))],
+                rows,
+                [_deflate_segment(document_tail.encode('utf-8'))],
+            ))
+
+def write_with_ooxml_parallel(records, fileobj, workers=None, table_per_page=False, layout=DEFAULT_LAYOUT,
+                              total=None):
+    """write_ooxml_docx_parallel 加上量測與進度回報；total 與 ooxml_engine.write_with_ooxml 相同"""
+    records = track(records, total=total)
+    with stage('build_save', labels=total, workers=workers) as record:
+        write_ooxml_docx_parallel(records, fileobj, workers=workers, table_per_page=table_per_page, layout=layout)
+        record['bytes'] = fileobj.tell()
+
+def generate_with_ooxml_parallel(df, workers=None, table_per_page=False, layout=DEFAULT_LAYOUT):
+    """OOXML 引擎的多行程版本，輸出內容與 generate_with_ooxml 相同"""
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        write_with_ooxml_parallel(
+            iter_label_records(df), output, workers=workers, table_per_page=table_per_page, layout=layout,
+            total=len(df),
+        )
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output
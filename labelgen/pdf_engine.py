@@ -0,0 +1,189 @@
+"""
+PDF 引擎：不經過 Word，直接用 reportlab 畫出與 .docx 相同版面 (預設 A4 2x8) 的標籤。
+
+需另外安裝 reportlab。中文字型必須是 TrueType (.ttf/.ttc)，內嵌時只保留用到的字 (子集)。
+字型依序取自 font_path 參數、環境變數 LABELGEN_PDF_FONT、PDF_FONT_CANDIDATES。
+標楷體沒有粗體字面，姓名的粗體比照 Word 以描邊模擬。
+"""
+from functools import lru_cache
+import os
+import re
+import tempfile
+
+from .instrument import reporting_progress, stage, track
+from .layout import DEFAULT_LAYOUT
+from .ooxml_engine import SPOOL_MAX_BYTES
+from .records import iter_label_records
+
+PDF_FONT_ENV = 'LABELGEN_PDF_FONT'
+PDF_FONT_CANDIDATES = (
+    r'C:\Windows\Fonts\kaiu.ttf',                  # 標楷體 (Windows)
+    '/usr/share/fonts/truetype/arphic/ukai.ttc',   # AR PL UKai (Debian/Ubuntu 的 fonts-arphic-ukai)
+    '/usr/share/fonts/TTF/ukai.ttc',
+)
+# Word 預設表格樣式的左右儲存格邊界 (108 twips)
+CELL_PADDING_PT = 5.4
+# 模擬粗體的描邊寬度 (相對於字級)
+FAKE_BOLD_STROKE = 0.03
+
+def find_pdf_font(font_path=None):
+    """回傳要內嵌的中文 TrueType 字型路徑，找不到時拋出 FileNotFoundError"""
+    path = font_path or os.environ.get(PDF_FONT_ENV)
+    if path:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"找不到字型檔：{path}")
+        return path
+    for candidate in PDF_FONT_CANDIDATES:
+        if os.path.isfile(candidate):
+            return candidate
+    raise FileNotFoundError(
+        f"找不到中文 TrueType 字型，請以環境變數 {PDF_FONT_ENV} 指定字型檔 (例如標楷體 kaiu.ttf)"
+    )
+
+def check_pdf_support(font_path=None):
+    """
+    確認可以輸出 PDF 並回傳字型路徑：沒有安裝 reportlab 時拋出 ImportError，
+    找不到中文字型時拋出 FileNotFoundError。不會載入字型，可以在畫面上先檢查。
+    """
+    try:
+        import reportlab  # noqa: F401
+    except ImportError:
+        raise ImportError("PDF 輸出需要另外安裝 reportlab (pip install reportlab)") from None
+    return find_pdf_font(font_path)
+
+@lru_cache(maxsize=None)
+def _register_font(path):
+    """向 reportlab 註冊字型 (每個行程每個檔案一次)，回傳字型名稱"""
+    try:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+    except ImportError:
+        raise ImportError("PDF 輸出需要另外安裝 reportlab (pip install reportlab)") from None
+
+    name = f'LabelFont{_register_font.cache_info().currsize}'
+    pdfmetrics.registerFont(TTFont(name, path))
+    return name
+
+class _FontMetrics:
+    """字寬與行高 (單位為 pt)，斷行時逐字查表，不必每次呼叫 reportlab"""
+
+    def __init__(self, font_name):
+        from reportlab.pdfbase import pdfmetrics
+        face = pdfmetrics.getFont(font_name).face
+        self._widths = face.charWidths
+        self._default_width = face.defaultWidth
+        self.ascent = face.ascent / 1000
+        self.line_height = (face.ascent - face.descent) / 1000
+
+    def char_width(self, ch, size):
+        return self._widths.get(ord(ch), self._default_width) * size / 1000
+
+    def wrap(self, text, size, max_width):
+        """
+        依寬度斷行：中文逐字斷行，英數字串盡量從空白處斷開；\\r、\\n 為強制換行。
+        空字串也算一行，與 Word 的空段落相同。
+        """
+        lines = []
+        for segment in re.split('[\r\n]', text.replace('\t', ' ')):
+            start = 0
+            width = 0.0
+            space = -1  # 目前這行最後一個空白的位置
+            for i, ch in enumerate(segment):
+                w = self.char_width(ch, size)
+                if width + w > max_width and i > start:
+                    if ch.isascii() and ch.isalnum() and space > start:
+                        lines.append(segment[start:space])
+                        start = space + 1
+                    else:
+                        lines.append(segment[start:i])
+                        start = i
+                    width = sum(self.char_width(c, size) for c in segment[start:i])
+                    space = -1
+                if ch == ' ':
+                    space = i
+                width += w
+            lines.append(segment[start:])
+        return lines
+
+def _draw_label(canvas, font_name, metrics, layout, left, top, name, raw_address):
+    """畫一格標籤：姓名 (粗體) + 地址，整體垂直置中，超出格子的行不畫"""
+    name_size = layout.name_font_size
+    address_size = layout.address_font_size
+    inner_width = layout.label_width.pt - 2 * CELL_PADDING_PT
+    name_lines = metrics.wrap(f"{name} 君收", name_size, inner_width - layout.name_indent.pt) if name else ['']
+    address_lines = metrics.wrap(raw_address, address_size, inner_width - layout.address_indent.pt)
+
+    name_line_height = metrics.line_height * name_size
+    address_line_height = metrics.line_height * address_size
+    block_height = (
+        layout.name_space_before.pt + len(name_lines) * name_line_height
+        + layout.name_space_after.pt + len(address_lines) * address_line_height
+    )
+    bottom = top - layout.label_height.pt
+    y = top - max(0.0, (layout.label_height.pt - block_height) / 2) - layout.name_space_before.pt
+
+    x = left + CELL_PADDING_PT + layout.name_indent.pt
+    canvas.setFont(font_name, name_size)
+    canvas.setLineWidth(name_size * FAKE_BOLD_STROKE)
+    for line in name_lines:
+        if y - name_line_height < bottom:
+            return
+        if line:
+            canvas.drawString(x, y - metrics.ascent * name_size, line, mode=2)  # 2 = 填色 + 描邊
+        y -= name_line_height
+    y -= layout.name_space_after.pt
+
+    x = left + CELL_PADDING_PT + layout.address_indent.pt
+    canvas.setFont(font_name, address_size)
+    for line in address_lines:
+        if y - address_line_height < bottom:
+            return
+        if line:
+            canvas.drawString(x, y - metrics.ascent * address_size, line)
+        y -= address_line_height
+
+def write_label_pdf(records, fileobj, font_path=None, layout=DEFAULT_LAYOUT):
+    """將 (姓名, 地址) 依 layout 版面 (預設 2x8) 逐頁畫到 fileobj，格子位置與 .docx 的表格相同；回傳標籤數"""
+    font_name = _register_font(find_pdf_font(font_path))
+    from reportlab.pdfgen.canvas import Canvas
+
+    metrics = _FontMetrics(font_name)
+    page_height = layout.page_height.pt
+    label_width = layout.label_width.pt
+    label_height = layout.label_height.pt
+    i = -1
+    # 起始字型也設成內嵌字型，PDF 裡才不會出現未內嵌的 Helvetica
+    canvas = Canvas(
+        fileobj, pagesize=(layout.page_width.pt, page_height), pageCompression=1,
+        initialFontName=font_name, initialFontSize=layout.address_font_size,
+    )
+    for i, (name, raw_address) in enumerate(records):
+        slot = i % layout.labels_per_page
+        if i and not slot:
+            canvas.showPage()
+        row, col = divmod(slot, layout.cols)
+        left = layout.margin_left.pt + col * label_width
+        top = page_height - layout.margin_top.pt - row * label_height
+        _draw_label(canvas, font_name, metrics, layout, left, top, name, raw_address)
+    if i < 0:
+        canvas.showPage()  # 沒有資料時仍輸出一張空白頁，與 .docx 相同
+    canvas.save()
+    return i + 1
+
+def generate_label_pdf(df, font_path=None, progress=None, layout=DEFAULT_LAYOUT):
+    """
+    產生標籤 PDF，回傳已 seek(0) 的 SpooledTemporaryFile (超過 SPOOL_MAX_BYTES 時落在磁碟上)。
+    progress 與 generate_word_doc 相同。用完請自行 close()。
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        with reporting_progress(progress):
+            records = track(iter_label_records(df), total=len(df))
+            with stage('build_save', labels=len(df)) as record:
+                write_label_pdf(records, output, font_path=font_path, layout=layout)
+                record['bytes'] = output.tell()
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output
@@ -0,0 +1,31 @@
+"""排版前的資料清理：把 DataFrame 的姓名、地址欄整欄轉成乾淨的字串。"""
+from .instrument import stage
+
+def clean_label_column(df, column):
+    """
+    整欄一次清理成字串 list：空值與 'nan' 視為空字串，前後空白 (含全形空白) 去除。
+
+    欄位不存在時回傳等長的空字串 list。
+    """
+    if column not in df.columns:
+        return [''] * len(df)
+    values = df[column]
+    values = values.where(values.notna(), '').astype(str).str.strip()
+    return values.mask(values == 'nan', '').tolist()
+
+def clean_label_text(value):
+    """單一值的清理，規則與 clean_label_column 相同；value 為字串、None 或 NaN"""
+    if value is None or value != value:  # value != value 代表 NaN
+        return ''
+    text = str(value).strip()
+    return '' if text == 'nan' else text
+
+def clean_label_records(df):
+    """排版前的預處理：回傳清理後的 (姓名 list, 地址 list)"""
+    # 這裡不需要 process_address 去拆分郵遞區號了，因為我們要直接印 raw_address
+    with stage('clean', labels=len(df)):
+        return clean_label_column(df, '姓名'), clean_label_column(df, '通訊地址')
+
+def iter_label_records(df):
+    """逐筆產生清理過的 (姓名, 地址)，排版迴圈只會拿到一般的 Python 字串"""
+    return zip(*clean_label_records(df))
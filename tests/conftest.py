@@ -0,0 +1,5 @@
+"""讓測試不必安裝套件也能匯入 labelgen"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,46 @@
+"""上傳檔的事前檢查：<dimension> 只是粗略的上限，不能擋下讀得進來的檔案。"""
+from io import BytesIO
+
+import openpyxl
+from openpyxl.styles import Font
+import pytest
+
+from labelgen import UploadTooLarge, check_upload, load_excel_with_auto_header, sheet_filled_rows
+
+def make_book(data_rows, title_rows=0, formatted_row=None):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for i in range(title_rows):
+        ws.append([f'標題 {i}'])
+    ws.append(['姓名', '通訊地址'])
+    for i in range(data_rows):
+        ws.append([f'王{i}', f'地址 {i}'])
+    if formatted_row:
+        ws.cell(formatted_row, 1).font = Font(bold=True)
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+def check(file, max_rows):
+    check_upload(file, len(file.getvalue()), max_rows=max_rows)
+
+def test_formatted_empty_cell_far_below_is_accepted():
+    file = make_book(10, formatted_row=300000)
+    check(file, max_rows=200000)
+    assert len(load_excel_with_auto_header(file, max_rows=200000)) == 10
+
+def test_header_and_title_rows_do_not_count():
+    file = make_book(100, title_rows=3)
+    check(file, max_rows=100)
+    assert len(load_excel_with_auto_header(file, max_rows=100)) == 100
+
+def test_clearly_oversized_sheet_is_rejected():
+    with pytest.raises(UploadTooLarge):
+        check(make_book(200), max_rows=100)
+
+def test_sheet_filled_rows_stops_at_limit():
+    file = make_book(50, formatted_row=1000)
+    assert sheet_filled_rows(file) == 51
+    assert sheet_filled_rows(file, limit=10) == 11
+    assert sheet_filled_rows(BytesIO(b'not a workbook')) is None
@@ -0,0 +1,43 @@
+"""
+build_label_document 等回傳給呼叫端的文件必須獨立：改了樣式或文件屬性，
+不能影響之後建立的文件 (母版有快取，Streamlit 伺服器上所有 session 共用)。
+"""
+from io import BytesIO
+import zipfile
+
+import pandas as pd
+import pytest
+
+import labelgen
+from labelgen.docx_engine import new_label_document
+
+def generated_parts(engine):
+    df = pd.DataFrame({'姓名': ['王小明'], '通訊地址': ['臺東市中華路一段1號']}, dtype=str)
+    with labelgen.generate_word_doc(df, engine=engine) as f, zipfile.ZipFile(f) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+@pytest.mark.parametrize('build', ['build_label_document', 'build_label_document_cloned'])
+def test_built_document_changes_do_not_leak(build):
+    before = {engine: generated_parts(engine) for engine in labelgen.ENGINES}
+
+    doc = getattr(labelgen, build)([('a', 'b')])
+    doc.core_properties.author = 'LEAKED'
+    doc.styles['Normal'].font.bold = True
+    doc.settings.odd_and_even_pages_header_footer = True
+    doc.save(BytesIO())
+
+    fresh = new_label_document()
+    assert fresh.core_properties.author != 'LEAKED'
+    assert fresh.styles['Normal'].font.bold is None
+    assert not fresh.settings.odd_and_even_pages_header_footer
+    for engine, parts in before.items():
+        assert generated_parts(engine) == parts, engine
+
+def test_modified_document_is_saved_with_its_changes():
+    doc = labelgen.build_label_document([('a', 'b')])
+    doc.core_properties.author = '王小明'
+    buffer = BytesIO()
+    from labelgen.ooxml_engine import save_label_document
+    save_label_document(doc, buffer)
+    with zipfile.ZipFile(buffer) as zf:
+        assert '王小明' in zf.read('docProps/core.xml').decode('utf-8')
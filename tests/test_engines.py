@@ -0,0 +1,75 @@
+"""
+各引擎的輸出必須逐零件相同：label_cache_key 不含引擎也是靠這一點。
+
+順便用 ZipFile.testzip() 檢查每份輸出的 CRC，ooxml_engine 直接寫入預先壓縮的零件時
+改動了 zipfile 的內部欄位，Python 改版造成壞檔時這裡會抓到。
+"""
+from io import BytesIO
+import zipfile
+
+import pandas as pd
+import pytest
+
+import labelgen
+from labelgen import ooxml_engine
+from labelgen.records import iter_label_records
+
+LAYOUTS = ['a4-2x8', 'avery-l7163', 'envelope-dl']
+
+def make_frame(n):
+    return pd.DataFrame({
+        '姓名': [f'王小明{i}' if i % 7 else '' for i in range(n)],
+        '通訊地址': [f'(950)臺東縣臺東市中華路一段{i}號' if i % 5 else f'  地址 {i}\t之一 ' for i in range(n)],
+    }, dtype=str)
+
+def read_parts(fileobj):
+    """檢查 zip 的 CRC 後回傳 {檔名: 內容}"""
+    with zipfile.ZipFile(fileobj) as zf:
+        assert zf.testzip() is None
+        return {info.filename: zf.read(info) for info in zf.infolist()}
+
+def table_per_page_options(layout):
+    return [False, True] if layout.page_break_fits else [False]
+
+@pytest.mark.parametrize('layout_key', LAYOUTS)
+@pytest.mark.parametrize('n', [0, 1, 17, 100])
+def test_engines_produce_identical_parts(layout_key, n):
+    layout = labelgen.LAYOUT_PRESETS[layout_key]
+    df = make_frame(n)
+    for table_per_page in table_per_page_options(layout):
+        outputs = {}
+        for engine in labelgen.ENGINES:
+            with labelgen.generate_word_doc(df, engine=engine, table_per_page=table_per_page, layout=layout) as f:
+                outputs[engine] = read_parts(f)
+        expected = outputs.pop(labelgen.ENGINE_DOCX)
+        for engine, parts in outputs.items():
+            assert parts == expected, (engine, table_per_page)
+
+@pytest.mark.parametrize('table_per_page', [False, True])
+def test_parallel_chunks_match_single_process(table_per_page):
+    layout = labelgen.DEFAULT_LAYOUT
+    records = list(iter_label_records(make_frame(5 * layout.labels_per_page + 3)))
+    single = BytesIO()
+    labelgen.write_ooxml_docx(records, single, table_per_page=table_per_page, layout=layout)
+    parallel = BytesIO()
+    labelgen.write_ooxml_docx_parallel(
+        records, parallel, workers=2, chunk_pages=1, table_per_page=table_per_page, layout=layout,
+    )
+    assert read_parts(parallel) == read_parts(single)
+
+def test_passthrough_writes_valid_zip():
+    data = [b'<w:t>' * 1000, b'', '王小明'.encode('utf-8') * 50]
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        ooxml_engine._write_passthrough_member(zf, 'part.xml', [ooxml_engine._deflate_segment(d) for d in data])
+    assert read_parts(buffer) == {'part.xml': b''.join(data)}
+    assert ooxml_engine._passthrough_supported()
+
+def test_inflated_fallback_matches(monkeypatch):
+    df = make_frame(40)
+    with labelgen.generate_word_doc(df, engine=labelgen.ENGINE_OOXML) as f:
+        expected = read_parts(f)
+    monkeypatch.setattr(ooxml_engine, '_passthrough_supported', lambda: False)
+    for engine in (labelgen.ENGINE_DOCX, labelgen.ENGINE_OOXML):
+        with labelgen.generate_word_doc(df, engine=engine) as f:
+            assert read_parts(f) == expected
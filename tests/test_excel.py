@@ -0,0 +1,79 @@
+"""串流讀取 (iter_excel_records) 的結果必須與 DataFrame 路徑完全相同。"""
+from datetime import date
+from io import BytesIO
+import zipfile
+
+import openpyxl
+import pytest
+
+import labelgen
+from labelgen.cli import convert_file
+
+CASES = {
+    'basic': [['姓名', '通訊地址'], ['王', '台北'], ['李', '高雄']],
+    'offset': [
+        ['標題'], [None], ['備註', '姓名', None, '通訊地址', '電話'],
+        ['王', ' 小明 ', None, '  台北\u3000', 123], [None] * 5, [None, 'nan', None, 3.0, None],
+        [None, None, None, None, 'x'], [None, '張', None, date(2020, 1, 2), None], [None] * 5, [None] * 5,
+    ],
+    'duplicate_header': [['姓名', '通訊地址', '姓名'], ['a', 'b', 'c'], ['d', None, None], [None] * 3],
+    'short_rows': [[None, None, '姓名', '通訊地址'], [None, None, '只有名']],
+    'interior_blank': [['姓名', '通訊地址'], [None, None], [None, None], ['a', 'b'], [None, None]],
+    'header_only': [['姓名', '通訊地址']],
+}
+
+def read_parts(fileobj):
+    """{檔名: 內容}；分冊 ZIP 中的 .docx 展開成各自的零件 (zip 內的時間戳記不比較)"""
+    with zipfile.ZipFile(fileobj) as zf:
+        return {
+            name: read_parts(BytesIO(zf.read(name))) if name.endswith('.docx') else zf.read(name)
+            for name in zf.namelist()
+        }
+
+def make_book(rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for r, row in enumerate(rows, 1):
+        for c, value in enumerate(row, 1):
+            if value is not None:
+                ws.cell(r, c, value)
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+@pytest.mark.parametrize('reader', [labelgen.READER_OPENPYXL, labelgen.READER_PANDAS])
+@pytest.mark.parametrize('case', list(CASES))
+def test_streamed_records_match_frame(case, reader):
+    file = make_book(CASES[case])
+    df = labelgen.load_excel_with_auto_header(file, reader=reader)
+    df.columns = [str(c).strip() for c in df.columns]
+    assert list(labelgen.iter_excel_records(file, reader=reader)) == list(labelgen.iter_label_records(df))
+
+def test_streamed_records_errors():
+    with pytest.raises(ValueError, match='通訊地址'):
+        labelgen.iter_excel_records(make_book([['姓名', '地址'], ['a', 'b']]))
+    with pytest.raises(ValueError, match='無法讀取'):
+        labelgen.iter_excel_records(BytesIO(b'not a workbook'))
+    file = make_book([['姓名', '通訊地址']] + [['a', 'b']] * 5 + [[None, None]] * 3)
+    assert len(list(labelgen.iter_excel_records(file, max_rows=5))) == 5
+    with pytest.raises(labelgen.UploadTooLarge):
+        list(labelgen.iter_excel_records(file, max_rows=4))
+
+@pytest.mark.parametrize('pages_per_file', [None, 1])
+def test_convert_file_matches_frame_path(tmp_path, pages_per_file):
+    input_path = tmp_path / '名單.xlsx'
+    input_path.write_bytes(make_book(CASES['offset'] + [['', f'王{i}', None, f'地址{i}']
+                                                        for i in range(40)]).getvalue())
+    output_path = tmp_path / 'out'
+    count = convert_file(str(input_path), str(output_path), pages_per_file=pages_per_file)
+
+    with open(input_path, 'rb') as f:
+        df = labelgen.load_excel_with_auto_header(f)
+    assert count == len(df)
+    generate = labelgen.generate_word_doc if pages_per_file is None else labelgen.generate_label_bundle
+    kwargs = {'engine': labelgen.ENGINE_OOXML}
+    if pages_per_file:
+        kwargs['pages_per_file'] = pages_per_file
+    with generate(df, **kwargs) as expected:
+        assert read_parts(output_path) == read_parts(expected)
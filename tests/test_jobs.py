@@ -0,0 +1,48 @@
+"""背景工作佇列：同時執行的工作加起來不能開超過 CPU 核心數的子行程。"""
+import os
+import time
+
+from labelgen import PROCESS_WORKERS_ENV, JobQueue
+
+def wait_all(queue, job_ids):
+    for _ in range(200):
+        if all(queue.get(job_id) is None or queue.get(job_id).is_finished for job_id in job_ids):
+            return
+        time.sleep(0.01)
+    raise AssertionError('工作沒有結束')
+
+def test_process_workers_split_cores(monkeypatch):
+    monkeypatch.delenv(PROCESS_WORKERS_ENV, raising=False)
+    monkeypatch.setattr(os, 'cpu_count', lambda: 8)
+    assert JobQueue(max_workers=2).process_workers == 4
+    assert JobQueue(max_workers=3).process_workers == 2
+    assert JobQueue(max_workers=16).process_workers == 1
+
+def test_process_workers_from_env(monkeypatch):
+    monkeypatch.setenv(PROCESS_WORKERS_ENV, '3')
+    assert JobQueue(max_workers=2).process_workers == 3
+    assert JobQueue(max_workers=2, process_workers=5).process_workers == 5
+
+def test_results_bounded_by_bytes():
+    queue = JobQueue(max_workers=1, result_max_bytes=250)
+    job_ids = []
+    for i in range(4):
+        job_ids.append(queue.submit(lambda i=i: bytes([i]) * 100))
+        wait_all(queue, job_ids)
+    # 最舊的兩個被擠掉，總數不超過上限
+    assert [queue.get(job_id) is not None for job_id in job_ids] == [False, False, True, True]
+
+def test_oversized_latest_result_is_kept():
+    queue = JobQueue(max_workers=1, result_max_bytes=10)
+    job_ids = [queue.submit(lambda: b'x' * 100), queue.submit(lambda: b'y' * 100)]
+    wait_all(queue, job_ids)
+    assert queue.get(job_ids[0]) is None
+    assert queue.get(job_ids[1]).result == b'y' * 100
+
+def test_expired_jobs_pruned_on_get():
+    queue = JobQueue(max_workers=1, result_ttl=0.05)
+    job_id = queue.submit(lambda: b'data')
+    wait_all(queue, [job_id])
+    assert queue.get(job_id) is not None
+    time.sleep(0.1)
+    assert queue.get(job_id) is None
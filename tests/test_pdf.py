@@ -0,0 +1,18 @@
+"""PDF 輸出的前置檢查：畫面上依此決定是否提供 PDF。"""
+import pytest
+
+from labelgen import pdf_engine
+
+def test_check_pdf_support_without_font(monkeypatch, tmp_path):
+    pytest.importorskip('reportlab')
+    monkeypatch.delenv(pdf_engine.PDF_FONT_ENV, raising=False)
+    monkeypatch.setattr(pdf_engine, 'PDF_FONT_CANDIDATES', (str(tmp_path / 'missing.ttc'),))
+    with pytest.raises(FileNotFoundError):
+        pdf_engine.check_pdf_support()
+
+def test_check_pdf_support_with_font(monkeypatch, tmp_path):
+    pytest.importorskip('reportlab')
+    font = tmp_path / 'font.ttf'
+    font.write_bytes(b'')
+    monkeypatch.setenv(pdf_engine.PDF_FONT_ENV, str(font))
+    assert pdf_engine.check_pdf_support() == str(font)